@@ -5,13 +5,25 @@ Reads Scryfall JSON card data and saves it to MySQL database using stored proced
 """
 
 import json
+import ijson  # picks the C yajl2 backend when available
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to the stdlib encoder
+    orjson = None
 import mariadb
 from mariadb import Error
 import logging
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+from datetime import date
+from typing import List, Dict, Any, Optional, Iterable, Iterator, BinaryIO, Tuple
+from itertools import islice
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import threading
+import time
 import argparse
+import os
 import sys
+import tempfile
 from pathlib import Path
 
 # Configure logging
@@ -21,18 +33,240 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# ER_LOCK_DEADLOCK and ER_LOCK_WAIT_TIMEOUT: InnoDB rolled the batch back, and
+# rerunning it once the other transaction is done normally succeeds
+RETRYABLE_ERRNOS = (1213, 1205)
+BATCH_ATTEMPTS = 3
+
+# Columns of the `cards` table, in insert order
+CARD_COLUMNS = (
+    'id', 'oracle_id', 'name', 'lang', 'released_at', 'uri', 'scryfall_uri', 'layout',
+    'highres_image', 'image_status', 'mana_cost', 'cmc', 'type_line', 'oracle_text',
+    'reserved', 'game_changer', 'foil', 'nonfoil', 'oversized', 'promo', 'reprint', 'variation',
+    'set_id', 'set_code', 'set_name', 'set_type', 'collector_number', 'digital', 'rarity',
+    'card_back_id', 'artist', 'border_color', 'frame', 'full_art', 'textless', 'booster', 'story_spotlight'
+)
+
+# Stored procedure parameters in call order: (name, card key, default, kind).
+# kind is 'json' for values passed as JSON text and 'date' for released_at.
+CARD_PARAMS = (
+    ('id', 'id', None, None),
+    ('oracle_id', 'oracle_id', None, None),
+    ('multiverse_ids', 'multiverse_ids', [], 'json'),
+    ('mtgo_id', 'mtgo_id', None, None),
+    ('arena_id', 'arena_id', None, None),
+    ('tcgplayer_id', 'tcgplayer_id', None, None),
+    ('cardmarket_id', 'cardmarket_id', None, None),
+    ('name', 'name', None, None),
+    ('lang', 'lang', None, None),
+    ('released_at', 'released_at', None, 'date'),
+    ('uri', 'uri', None, None),
+    ('scryfall_uri', 'scryfall_uri', None, None),
+    ('layout', 'layout', None, None),
+    ('highres_image', 'highres_image', False, None),
+    ('image_status', 'image_status', None, None),
+    ('image_uris', 'image_uris', {}, 'json'),
+    ('mana_cost', 'mana_cost', None, None),
+    ('cmc', 'cmc', None, None),
+    ('type_line', 'type_line', None, None),
+    ('oracle_text', 'oracle_text', None, None),
+    ('colors', 'colors', [], 'json'),
+    ('color_identity', 'color_identity', [], 'json'),
+    ('keywords', 'keywords', [], 'json'),
+    ('produced_mana', 'produced_mana', [], 'json'),
+    ('legalities', 'legalities', {}, 'json'),
+    ('games', 'games', [], 'json'),
+    ('reserved', 'reserved', False, None),
+    ('game_changer', 'game_changer', False, None),
+    ('foil', 'foil', False, None),
+    ('nonfoil', 'nonfoil', False, None),
+    ('finishes', 'finishes', [], 'json'),
+    ('oversized', 'oversized', False, None),
+    ('promo', 'promo', False, None),
+    ('reprint', 'reprint', False, None),
+    ('variation', 'variation', False, None),
+    ('set_id', 'set_id', None, None),
+    ('set_code', 'set', None, None),
+    ('set_name', 'set_name', None, None),
+    ('set_type', 'set_type', None, None),
+    ('collector_number', 'collector_number', None, None),
+    ('digital', 'digital', False, None),
+    ('rarity', 'rarity', None, None),
+    ('card_back_id', 'card_back_id', None, None),
+    ('artist', 'artist', None, None),
+    ('artist_ids', 'artist_ids', [], 'json'),
+    ('border_color', 'border_color', None, None),
+    ('frame', 'frame', None, None),
+    ('full_art', 'full_art', False, None),
+    ('textless', 'textless', False, None),
+    ('booster', 'booster', False, None),
+    ('story_spotlight', 'story_spotlight', False, None),
+    ('prices', 'prices', {}, 'json'),
+    ('related_uris', 'related_uris', {}, 'json'),
+    ('purchase_uris', 'purchase_uris', {}, 'json'),
+)
+
+# Shared encoder for the JSON parameters: orjson when installed, otherwise a stdlib encoder
+# built once instead of per json.dumps call, with circular checks skipped since the values
+# are small acyclic lists and dicts
+if orjson is not None:
+    def _ENCODE(value: Any, _dumps=orjson.dumps) -> str:
+        return _dumps(value).decode()
+else:
+    _ENCODE = json.JSONEncoder(
+        ensure_ascii=False, separators=(',', ':'), check_circular=False, sort_keys=False
+    ).encode
+
+# Decoder for the raw card lines the preparation workers receive
+_DECODE = orjson.loads if orjson is not None else json.loads
+
+_PARAMS_BY_NAME = {param[0]: param for param in CARD_PARAMS}
+# Subset of the parameters stored directly in the `cards` table, in CARD_COLUMNS order
+CARD_ROW_PARAMS = tuple(_PARAMS_BY_NAME[col] for col in CARD_COLUMNS)
+
+
+def _parse_date(date_str: Optional[str]) -> Optional[date]:
+    """Parse date string to MySQL format."""
+    if not date_str:
+        return None
+    # Scryfall dates are fixed-width YYYY-MM-DD, so slice instead of going through strptime
+    try:
+        if len(date_str) != 10 or date_str[4] != '-' or date_str[7] != '-':
+            raise ValueError(date_str)
+        return date(int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]))
+    except ValueError:
+        logger.warning(f"Invalid date format: {date_str}")
+        return None
+
+
+def _row_tuple(card: Dict[str, Any], _dumps=_ENCODE, _parse_date=_parse_date,
+               _params=CARD_PARAMS) -> tuple:
+    """Build the positional parameter tuple for a card from a static descriptor table."""
+    get = card.get  # bound once rather than looked up for every column
+    return tuple(
+        get(key, default) if kind is None
+        else _dumps(get(key, default)) if kind == 'json'
+        else _parse_date(get(key, default))
+        for _, key, default, kind in _params
+    )
+
+
+# Escapes for LOAD DATA's default format: tab-separated, backslash-escaped, \N for NULL
+_TSV_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0'})
+
+
+def _tsv_line(row: tuple) -> str:
+    """Render a row as one line of a LOAD DATA INFILE file."""
+    return '\t'.join(
+        '\\N' if value is None
+        else ('1' if value else '0') if isinstance(value, bool)
+        else str(value).translate(_TSV_ESCAPES)
+        for value in row
+    ) + '\n'
+
+
+# Child tables holding one row per element of a card array field: (table, column, card key)
+CARD_LIST_TABLES = (
+    ('card_multiverse_ids', 'multiverse_id', 'multiverse_ids'),
+    ('card_colors', 'color', 'colors'),
+    ('card_color_identity', 'color', 'color_identity'),
+    ('card_keywords', 'keyword', 'keywords'),
+    ('card_produced_mana', 'mana_symbol', 'produced_mana'),
+    ('card_games', 'game', 'games'),
+    ('card_finishes', 'finish', 'finishes'),
+    ('card_artist_ids', 'artist_id', 'artist_ids'),
+)
+
+# Child tables holding one row per card for a nested object: (table, card key, ((column, object key), ...))
+CARD_OBJECT_TABLES = (
+    ('card_image_uris', 'image_uris', (
+        ('small_uri', 'small'), ('normal_uri', 'normal'), ('large_uri', 'large'),
+        ('png_uri', 'png'), ('art_crop_uri', 'art_crop'), ('border_crop_uri', 'border_crop'))),
+    ('card_prices', 'prices', (
+        ('usd', 'usd'), ('usd_foil', 'usd_foil'), ('usd_etched', 'usd_etched'),
+        ('eur', 'eur'), ('eur_foil', 'eur_foil'), ('tix', 'tix'))),
+    ('card_related_uris', 'related_uris', (
+        ('gatherer', 'gatherer'), ('tcgplayer_infinite_articles', 'tcgplayer_infinite_articles'),
+        ('tcgplayer_infinite_decks', 'tcgplayer_infinite_decks'), ('edhrec', 'edhrec'))),
+    ('card_purchase_uris', 'purchase_uris', (
+        ('tcgplayer', 'tcgplayer'), ('cardmarket', 'cardmarket'), ('cardhoarder', 'cardhoarder'))),
+)
+
+CARD_CHILD_TABLES = tuple(t[0] for t in CARD_LIST_TABLES + CARD_OBJECT_TABLES) + ('card_legalities',)
+
+# Multi-row upsert of the main card record; updated_at is always bumped so MariaDB
+# reports 1 affected row per insert and 2 per update
+UPSERT_CARD_SQL = (
+    f"INSERT INTO cards ({', '.join(CARD_COLUMNS)}) "
+    f"VALUES ({', '.join(['%s'] * len(CARD_COLUMNS))}) "
+    f"ON DUPLICATE KEY UPDATE "
+    + ', '.join(f"{col} = VALUES({col})" for col in CARD_COLUMNS[1:])
+    + ", updated_at = CURRENT_TIMESTAMP"
+)
+
+
+# Server-side load path: raw card JSON goes into a per-connection staging table and
+# MariaDB's JSON functions fill `cards` and the child tables with set-based statements
+STAGING_TABLE_SQL = (
+    "CREATE TEMPORARY TABLE IF NOT EXISTS cards_staging "
+    "(id VARCHAR(36) PRIMARY KEY, j LONGTEXT NOT NULL) CHARACTER SET utf8mb4"
+)
+
+
+def _staging_value(key: str, default: Any) -> str:
+    """SQL expression extracting a card key from the staged JSON document."""
+    if key == 'id':
+        return 's.id'
+    if isinstance(default, bool):
+        return f"COALESCE(JSON_VALUE(s.j, '$.{key}') = 'true', {str(default).upper()})"
+    return f"JSON_VALUE(s.j, '$.{key}')"
+
+
+STAGING_UPSERT_CARD_SQL = (
+    f"INSERT INTO cards ({', '.join(CARD_COLUMNS)}) "
+    f"SELECT {', '.join(_staging_value(key, default) for _, key, default, _ in CARD_ROW_PARAMS)} "
+    f"FROM cards_staging s "
+    f"ON DUPLICATE KEY UPDATE "
+    + ', '.join(f"{col} = VALUES({col})" for col in CARD_COLUMNS[1:])
+    + ", updated_at = CURRENT_TIMESTAMP"
+)
+
+STAGING_CHILD_SQL = tuple(
+    f"INSERT INTO {table} (card_id, {column}) SELECT s.id, jt.v FROM cards_staging s, "
+    f"JSON_TABLE(s.j, '$.{key}[*]' COLUMNS (v TEXT PATH '$')) jt"
+    for table, column, key in CARD_LIST_TABLES
+) + tuple(
+    f"INSERT INTO {table} (card_id, {', '.join(col for col, _ in columns)}) "
+    f"SELECT s.id, {', '.join(_staging_value(f'{key}.{obj_key}', None) for _, obj_key in columns)} "
+    f"FROM cards_staging s"
+    for table, key, columns in CARD_OBJECT_TABLES
+) + (
+    "INSERT INTO card_legalities (card_id, format_name, legality) "
+    "SELECT s.id, jt.format_name, JSON_VALUE(s.j, CONCAT('$.legalities.', jt.format_name)) "
+    "FROM cards_staging s, "
+    "JSON_TABLE(JSON_KEYS(s.j, '$.legalities'), '$[*]' COLUMNS (format_name VARCHAR(50) PATH '$')) jt",
+)
+
 
 class MTGCardDatabase:
     """Handles database operations for MTG cards."""
     
-    def __init__(self, host: str, database: str, user: str, password: str, port: int = 3306):
-        """Initialize database connection parameters."""
+    def __init__(self, host: str, database: str, user: str, password: str, port: int = 3306,
+                 compress: Optional[bool] = None):
+        """Initialize database connection parameters.
+        
+        compress enables zlib protocol compression; by default it is on for
+        remote hosts only, where bandwidth costs more than the CPU spent on it.
+        """
         self.host = host
         self.database = database
         self.user = user
         self.password = password
         self.port = port
+        self.compress = compress if compress is not None else host not in ('localhost', '127.0.0.1', '::1')
         self.connection = None
+        self._cursor = None
+        self._upsert_cursor = None
     
     def connect(self) -> bool:
         """Establish database connection."""
@@ -43,8 +277,18 @@ class MTGCardDatabase:
                 user=self.user,
                 password=self.password,
                 port=self.port,
-                autocommit=False
+                compress=self.compress,
+                autocommit=False,
+                local_infile=True
             )
+            # One cursor for the life of the connection. Unbuffered, since the only
+            # results read through it are one-row counts fetched in full, and
+            # executemany of a plain INSERT/DELETE goes out as a single
+            # COM_STMT_BULK_EXECUTE packet
+            self._cursor = self.connection.cursor(buffered=False)
+            # The cards upsert gets a cursor of its own, so its prepared statement
+            # handle survives the DELETE/INSERT statements run between batches
+            self._upsert_cursor = self.connection.cursor(prepared=True)
             logger.info(f"Successfully connected to MySQL database: {self.database}")
             return True
         except Error as e:
@@ -53,365 +297,497 @@ class MTGCardDatabase:
     
     def disconnect(self):
         """Close database connection."""
+        if self._upsert_cursor:
+            self._upsert_cursor.close()
+            self._upsert_cursor = None
+        if self._cursor:
+            self._cursor.close()
+            self._cursor = None
         if self.connection and self.connection.is_connected():
             self.connection.close()
             logger.info("MySQL connection closed")
     
-    def parse_date(self, date_str: Optional[str]) -> Optional[str]:
-        """Parse date string to MySQL format."""
-        if not date_str:
-            return None
-        try:
-            return datetime.strptime(date_str, '%Y-%m-%d').date()
-        except ValueError:
-            logger.warning(f"Invalid date format: {date_str}")
-            return None
-    
-    def safe_get(self, data: Dict, key: str, default=None):
-        """Safely get value from dictionary."""
-        return data.get(key, default)
-    
-    def prepare_card_data(self, card_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Prepare card data for database insertion."""
-        return {
-            'id': self.safe_get(card_data, 'id'),
-            'oracle_id': self.safe_get(card_data, 'oracle_id'),
-            'multiverse_ids': json.dumps(self.safe_get(card_data, 'multiverse_ids', [])),
-            'mtgo_id': self.safe_get(card_data, 'mtgo_id'),
-            'arena_id': self.safe_get(card_data, 'arena_id'),
-            'tcgplayer_id': self.safe_get(card_data, 'tcgplayer_id'),
-            'cardmarket_id': self.safe_get(card_data, 'cardmarket_id'),
-            'name': self.safe_get(card_data, 'name'),
-            'lang': self.safe_get(card_data, 'lang'),
-            'released_at': self.parse_date(self.safe_get(card_data, 'released_at')),
-            'uri': self.safe_get(card_data, 'uri'),
-            'scryfall_uri': self.safe_get(card_data, 'scryfall_uri'),
-            'layout': self.safe_get(card_data, 'layout'),
-            'highres_image': self.safe_get(card_data, 'highres_image', False),
-            'image_status': self.safe_get(card_data, 'image_status'),
-            'image_uris': json.dumps(self.safe_get(card_data, 'image_uris', {})),
-            'mana_cost': self.safe_get(card_data, 'mana_cost'),
-            'cmc': self.safe_get(card_data, 'cmc'),
-            'type_line': self.safe_get(card_data, 'type_line'),
-            'oracle_text': self.safe_get(card_data, 'oracle_text'),
-            'colors': json.dumps(self.safe_get(card_data, 'colors', [])),
-            'color_identity': json.dumps(self.safe_get(card_data, 'color_identity', [])),
-            'keywords': json.dumps(self.safe_get(card_data, 'keywords', [])),
-            'produced_mana': json.dumps(self.safe_get(card_data, 'produced_mana', [])),
-            'legalities': json.dumps(self.safe_get(card_data, 'legalities', {})),
-            'games': json.dumps(self.safe_get(card_data, 'games', [])),
-            'reserved': self.safe_get(card_data, 'reserved', False),
-            'game_changer': self.safe_get(card_data, 'game_changer', False),
-            'foil': self.safe_get(card_data, 'foil', False),
-            'nonfoil': self.safe_get(card_data, 'nonfoil', False),
-            'finishes': json.dumps(self.safe_get(card_data, 'finishes', [])),
-            'oversized': self.safe_get(card_data, 'oversized', False),
-            'promo': self.safe_get(card_data, 'promo', False),
-            'reprint': self.safe_get(card_data, 'reprint', False),
-            'variation': self.safe_get(card_data, 'variation', False),
-            'set_id': self.safe_get(card_data, 'set_id'),
-            'set_code': self.safe_get(card_data, 'set'),
-            'set_name': self.safe_get(card_data, 'set_name'),
-            'set_type': self.safe_get(card_data, 'set_type'),
-            'collector_number': self.safe_get(card_data, 'collector_number'),
-            'digital': self.safe_get(card_data, 'digital', False),
-            'rarity': self.safe_get(card_data, 'rarity'),
-            'card_back_id': self.safe_get(card_data, 'card_back_id'),
-            'artist': self.safe_get(card_data, 'artist'),
-            'artist_ids': json.dumps(self.safe_get(card_data, 'artist_ids', [])),
-            'border_color': self.safe_get(card_data, 'border_color'),
-            'frame': self.safe_get(card_data, 'frame'),
-            'full_art': self.safe_get(card_data, 'full_art', False),
-            'textless': self.safe_get(card_data, 'textless', False),
-            'booster': self.safe_get(card_data, 'booster', False),
-            'story_spotlight': self.safe_get(card_data, 'story_spotlight', False),
-            'prices': json.dumps(self.safe_get(card_data, 'prices', {})),
-            'related_uris': json.dumps(self.safe_get(card_data, 'related_uris', {})),
-            'purchase_uris': json.dumps(self.safe_get(card_data, 'purchase_uris', {}))
-        }
-    
     def insert_card(self, card_data: Dict[str, Any]) -> bool:
         """Insert a new card using the InsertCard stored procedure."""
+        return self._call_card_proc('InsertCard', card_data)
+    
+    def update_card(self, card_data: Dict[str, Any]) -> bool:
+        """Update an existing card using the UpdateCard stored procedure."""
+        return self._call_card_proc('UpdateCard', card_data)
+    
+    def upsert_card(self, card_data: Dict[str, Any]) -> bool:
+        """Insert or update a single card through the bulk upsert statement."""
+        return self._write_card('upsert', card_data, lambda: self.bulk_upsert([card_data]))
+    
+    def _call_card_proc(self, proc_name: str, card_data: Dict[str, Any]) -> bool:
+        """Call a card stored procedure with the card's positional parameters.
+        
+        The procedures run their own START TRANSACTION ... COMMIT, so the card is
+        committed on return, along with anything already pending on the connection.
+        """
+        return self._write_card(
+            proc_name, card_data,
+            lambda: self._cursor.callproc(proc_name, list(_row_tuple(card_data)))
+        )
+    
+    def _write_card(self, action: str, card_data: Dict[str, Any], write) -> bool:
+        """Run a single-card write, rolling back and logging on failure.
+        
+        The write decides the transaction: the upsert leaves it open for the
+        caller to commit, while the stored procedures commit on their own.
+        """
         if not self.connection:
             logger.error("No database connection")
             return False
         
         try:
-            prepared_data = self.prepare_card_data(card_data)
-            cursor = self.connection.cursor()
-            
-            # Call the InsertCard stored procedure
-            cursor.callproc('InsertCard', [
-                prepared_data['id'],
-                prepared_data['oracle_id'],
-                prepared_data['multiverse_ids'],
-                prepared_data['mtgo_id'],
-                prepared_data['arena_id'],
-                prepared_data['tcgplayer_id'],
-                prepared_data['cardmarket_id'],
-                prepared_data['name'],
-                prepared_data['lang'],
-                prepared_data['released_at'],
-                prepared_data['uri'],
-                prepared_data['scryfall_uri'],
-                prepared_data['layout'],
-                prepared_data['highres_image'],
-                prepared_data['image_status'],
-                prepared_data['image_uris'],
-                prepared_data['mana_cost'],
-                prepared_data['cmc'],
-                prepared_data['type_line'],
-                prepared_data['oracle_text'],
-                prepared_data['colors'],
-                prepared_data['color_identity'],
-                prepared_data['keywords'],
-                prepared_data['produced_mana'],
-                prepared_data['legalities'],
-                prepared_data['games'],
-                prepared_data['reserved'],
-                prepared_data['game_changer'],
-                prepared_data['foil'],
-                prepared_data['nonfoil'],
-                prepared_data['finishes'],
-                prepared_data['oversized'],
-                prepared_data['promo'],
-                prepared_data['reprint'],
-                prepared_data['variation'],
-                prepared_data['set_id'],
-                prepared_data['set_code'],
-                prepared_data['set_name'],
-                prepared_data['set_type'],
-                prepared_data['collector_number'],
-                prepared_data['digital'],
-                prepared_data['rarity'],
-                prepared_data['card_back_id'],
-                prepared_data['artist'],
-                prepared_data['artist_ids'],
-                prepared_data['border_color'],
-                prepared_data['frame'],
-                prepared_data['full_art'],
-                prepared_data['textless'],
-                prepared_data['booster'],
-                prepared_data['story_spotlight'],
-                prepared_data['prices'],
-                prepared_data['related_uris'],
-                prepared_data['purchase_uris']
-            ])
-            
-            self.connection.commit()
-            cursor.close()
-            logger.info(f"Successfully inserted card: {prepared_data['name']} ({prepared_data['id']})")
+            write()
+            logger.debug(f"Successfully ran {action} for card: {card_data.get('name')} ({card_data.get('id')})")
             return True
             
         except Error as e:
-            logger.error(f"Error inserting card {card_data.get('name', 'Unknown')}: {e}")
+            logger.error(f"Error running {action} for card {card_data.get('name', 'Unknown')}: {e}")
             self.connection.rollback()
             return False
     
-    def update_card(self, card_data: Dict[str, Any]) -> bool:
-        """Update an existing card using the UpdateCard stored procedure."""
+    @staticmethod
+    def card_child_rows(card_data: Dict[str, Any]) -> Dict[str, List[tuple]]:
+        """Explode a card's array and object fields into rows for the child tables."""
+        card_id = card_data.get('id')
+        rows = {}
+        
+        for table, _, key in CARD_LIST_TABLES:
+            rows[table] = [(card_id, value) for value in (card_data.get(key) or [])]
+        
+        for table, key, columns in CARD_OBJECT_TABLES:
+            obj = card_data.get(key) or {}
+            rows[table] = [(card_id,) + tuple(obj.get(obj_key) for _, obj_key in columns)]
+        
+        rows['card_legalities'] = [
+            (card_id, format_name, legality)
+            for format_name, legality in (card_data.get('legalities') or {}).items()
+        ]
+        return rows
+    
+    def bulk_upsert(self, cards: List[Dict[str, Any]], batch_size: int = 1000) -> Dict[str, int]:
+        """Insert or update cards with one multi-row statement per table and batch.
+        
+        Does not commit; the caller owns the transaction.
+        """
+        stats = {'inserted': 0, 'updated': 0}
         if not self.connection:
             logger.error("No database connection")
-            return False
+            return stats
+        
+        for i in range(0, len(cards), batch_size):
+            batch_stats = self._upsert_batch(self._cursor, cards[i:i + batch_size], self._upsert_cursor)
+            stats['inserted'] += batch_stats['inserted']
+            stats['updated'] += batch_stats['updated']
+        
+        return stats
+    
+    def _upsert_batch(self, cursor, batch: List[Dict[str, Any]], upsert_cursor=None) -> Dict[str, int]:
+        """Write one batch of cards and their child rows through the given cursor."""
+        card_rows, child_rows = _prepare_batch(batch)
+        return self._write_batch(cursor, card_rows, child_rows, upsert_cursor)
+    
+    def _write_batch(self, cursor, card_rows: List[tuple], child_rows: Dict[str, List[tuple]],
+                     upsert_cursor=None) -> Dict[str, int]:
+        """Write prepared card rows and child rows through the given cursor.
         
+        The cards upsert goes through upsert_cursor when one is given. Errors
+        propagate unlogged; the caller decides whether the batch failed or is retried.
+        """
+        if not card_rows:
+            return {'inserted': 0, 'updated': 0}
+        
+        card_ids = [row[0] for row in card_rows]
+        id_placeholders = ', '.join(['%s'] * len(card_ids))
+        
+        # Count the cards that already exist first: the upsert's affected rows (1 per insert,
+        # 2 per update, but 0 for an unchanged row) cannot tell inserts and updates apart
+        cursor.execute(f"SELECT COUNT(*) FROM cards WHERE id IN ({id_placeholders})", card_ids)
+        inserted = len(set(card_ids)) - cursor.fetchall()[0][0]
+        
+        upsert_cursor = upsert_cursor or cursor
+        upsert_cursor.executemany(UPSERT_CARD_SQL, card_rows)
+        
+        # Child rows are replaced wholesale, as the UpdateCard procedure does
+        for table in CARD_CHILD_TABLES:
+            cursor.execute(f"DELETE FROM {table} WHERE card_id IN ({id_placeholders})", card_ids)
+        
+        for table, column, _ in CARD_LIST_TABLES:
+            if child_rows[table]:
+                cursor.executemany(
+                    f"INSERT INTO {table} (card_id, {column}) VALUES (%s, %s)",
+                    child_rows[table]
+                )
+        
+        for table, _, columns in CARD_OBJECT_TABLES:
+            column_names = ', '.join(col for col, _ in columns)
+            placeholders = ', '.join(['%s'] * (len(columns) + 1))
+            cursor.executemany(
+                f"INSERT INTO {table} (card_id, {column_names}) VALUES ({placeholders})",
+                child_rows[table]
+            )
+        
+        if child_rows['card_legalities']:
+            cursor.executemany(
+                "INSERT INTO card_legalities (card_id, format_name, legality) VALUES (%s, %s, %s)",
+                child_rows['card_legalities']
+            )
+        
+        return {'inserted': inserted, 'updated': len(card_rows) - inserted}
+    
+    def bulk_load_initial(self, cards: Iterable[Dict[str, Any]], batch_size: int = 100) -> Dict[str, int]:
+        """Populate empty card tables with LOAD DATA LOCAL INFILE.
+        
+        Cards are streamed into one tab-separated temp file per table and
+        loaded without going through the SQL parser row by row. If the cards
+        table already has rows, falls back to the incremental upsert path.
+        """
+        # The shared cursor is unbuffered, so the check reads through its own buffered one
+        cursor = self.connection.cursor(buffered=True)
         try:
-            prepared_data = self.prepare_card_data(card_data)
-            cursor = self.connection.cursor()
+            cursor.execute("SELECT 1 FROM cards LIMIT 1")
+            has_cards = cursor.fetchone() is not None
+        finally:
+            cursor.close()
+        if has_cards:
+            logger.warning("Cards table is not empty, falling back to incremental upsert")
+            return self.process_cards_stream(cards, batch_size)
+        
+        stats = {'inserted': 0, 'updated': 0, 'failed': 0}
+        columns = {'cards': CARD_COLUMNS}
+        for table, column, _ in CARD_LIST_TABLES:
+            columns[table] = ('card_id', column)
+        for table, _, object_columns in CARD_OBJECT_TABLES:
+            columns[table] = ('card_id',) + tuple(col for col, _ in object_columns)
+        columns['card_legalities'] = ('card_id', 'format_name', 'legality')
+        
+        files = {
+            table: tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='', suffix=f'_{table}.tsv', delete=False)
+            for table in columns
+        }
+        checks_disabled = False
+        try:
+            self._set_bulk_load_checks(False)
+            checks_disabled = True
+            for card in cards:
+                if not card.get('id'):
+                    stats['failed'] += 1
+                    continue
+                files['cards'].write(_tsv_line(_row_tuple(card, _params=CARD_ROW_PARAMS)))
+                for table, rows in self.card_child_rows(card).items():
+                    files[table].writelines(_tsv_line(row) for row in rows)
+                stats['inserted'] += 1
             
-            # Call the UpdateCard stored procedure
-            cursor.callproc('UpdateCard', [
-                prepared_data['id'],
-                prepared_data['oracle_id'],
-                prepared_data['multiverse_ids'],
-                prepared_data['mtgo_id'],
-                prepared_data['arena_id'],
-                prepared_data['tcgplayer_id'],
-                prepared_data['cardmarket_id'],
-                prepared_data['name'],
-                prepared_data['lang'],
-                prepared_data['released_at'],
-                prepared_data['uri'],
-                prepared_data['scryfall_uri'],
-                prepared_data['layout'],
-                prepared_data['highres_image'],
-                prepared_data['image_status'],
-                prepared_data['image_uris'],
-                prepared_data['mana_cost'],
-                prepared_data['cmc'],
-                prepared_data['type_line'],
-                prepared_data['oracle_text'],
-                prepared_data['colors'],
-                prepared_data['color_identity'],
-                prepared_data['keywords'],
-                prepared_data['produced_mana'],
-                prepared_data['legalities'],
-                prepared_data['games'],
-                prepared_data['reserved'],
-                prepared_data['game_changer'],
-                prepared_data['foil'],
-                prepared_data['nonfoil'],
-                prepared_data['finishes'],
-                prepared_data['oversized'],
-                prepared_data['promo'],
-                prepared_data['reprint'],
-                prepared_data['variation'],
-                prepared_data['set_id'],
-                prepared_data['set_code'],
-                prepared_data['set_name'],
-                prepared_data['set_type'],
-                prepared_data['collector_number'],
-                prepared_data['digital'],
-                prepared_data['rarity'],
-                prepared_data['card_back_id'],
-                prepared_data['artist'],
-                prepared_data['artist_ids'],
-                prepared_data['border_color'],
-                prepared_data['frame'],
-                prepared_data['full_art'],
-                prepared_data['textless'],
-                prepared_data['booster'],
-                prepared_data['story_spotlight'],
-                prepared_data['prices'],
-                prepared_data['related_uris'],
-                prepared_data['purchase_uris']
-            ])
+            for file in files.values():
+                file.close()
             
+            # Parent table first so the child foreign keys resolve
+            for table, table_columns in columns.items():
+                path = files[table].name.replace('\\', '\\\\').replace("'", "\\'")
+                self._cursor.execute(
+                    f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE {table} "
+                    f"CHARACTER SET utf8mb4 ({', '.join(table_columns)})"
+                )
+                logger.info(f"Loaded {self._cursor.rowcount} rows into {table}")
             self.connection.commit()
-            cursor.close()
-            logger.info(f"Successfully updated card: {prepared_data['name']} ({prepared_data['id']})")
-            return True
             
-        except Error as e:
-            logger.error(f"Error updating card {card_data.get('name', 'Unknown')}: {e}")
+        except Exception as e:
+            logger.error(f"Error bulk loading cards: {e}")
             self.connection.rollback()
-            return False
+            stats['failed'] += stats['inserted']
+            stats['inserted'] = 0
+        finally:
+            for file in files.values():
+                file.close()
+                os.unlink(file.name)
+            if checks_disabled:
+                self._set_bulk_load_checks(True)
+        
+        return stats
     
-    def upsert_card(self, card_data: Dict[str, Any]) -> bool:
-        """Insert or update a card using the UpsertCard stored procedure."""
-        if not self.connection:
-            logger.error("No database connection")
-            return False
+    def _set_bulk_load_checks(self, enabled: bool):
+        """Toggle per-row index, unique and foreign key checks around an initial load.
         
+        Disabling defers non-unique index maintenance on cards to one rebuild at
+        ENABLE KEYS (InnoDB ignores DISABLE KEYS and just keeps the session flags).
+        """
+        flag = 1 if enabled else 0
+        if enabled:
+            self._cursor.execute("ALTER TABLE cards ENABLE KEYS")
+        self._cursor.execute(f"SET SESSION unique_checks = {flag}, foreign_key_checks = {flag}")
+        if not enabled:
+            self._cursor.execute("ALTER TABLE cards DISABLE KEYS")
+    
+    def load_via_staging(self, cards: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Upsert cards by staging their raw JSON and transforming it inside MariaDB.
+        
+        Each card is written once as a JSON line and loaded into a temporary
+        staging table; the column extraction and child-row explosion then run
+        as a handful of INSERT ... SELECT statements on the server. Requires
+        JSON_TABLE (MariaDB 10.6+).
+        """
+        stats = {'inserted': 0, 'updated': 0, 'failed': 0}
+        staged = 0
+        
+        file = tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='', suffix='_cards_staging.tsv', delete=False)
         try:
-            prepared_data = self.prepare_card_data(card_data)
-            cursor = self.connection.cursor()
+            with file:
+                for card in cards:
+                    card_id = card.get('id')
+                    if not card_id:
+                        stats['failed'] += 1
+                        continue
+                    # Compact JSON never contains a raw tab or newline, so no escaping is needed
+                    file.write(f"{card_id}\t{_ENCODE(card)}\n")
+                    staged += 1
             
-            # Call the UpsertCard stored procedure
-            cursor.callproc('UpsertCard', [
-                prepared_data['id'],
-                prepared_data['oracle_id'],
-                prepared_data['multiverse_ids'],
-                prepared_data['mtgo_id'],
-                prepared_data['arena_id'],
-                prepared_data['tcgplayer_id'],
-                prepared_data['cardmarket_id'],
-                prepared_data['name'],
-                prepared_data['lang'],
-                prepared_data['released_at'],
-                prepared_data['uri'],
-                prepared_data['scryfall_uri'],
-                prepared_data['layout'],
-                prepared_data['highres_image'],
-                prepared_data['image_status'],
-                prepared_data['image_uris'],
-                prepared_data['mana_cost'],
-                prepared_data['cmc'],
-                prepared_data['type_line'],
-                prepared_data['oracle_text'],
-                prepared_data['colors'],
-                prepared_data['color_identity'],
-                prepared_data['keywords'],
-                prepared_data['produced_mana'],
-                prepared_data['legalities'],
-                prepared_data['games'],
-                prepared_data['reserved'],
-                prepared_data['game_changer'],
-                prepared_data['foil'],
-                prepared_data['nonfoil'],
-                prepared_data['finishes'],
-                prepared_data['oversized'],
-                prepared_data['promo'],
-                prepared_data['reprint'],
-                prepared_data['variation'],
-                prepared_data['set_id'],
-                prepared_data['set_code'],
-                prepared_data['set_name'],
-                prepared_data['set_type'],
-                prepared_data['collector_number'],
-                prepared_data['digital'],
-                prepared_data['rarity'],
-                prepared_data['card_back_id'],
-                prepared_data['artist'],
-                prepared_data['artist_ids'],
-                prepared_data['border_color'],
-                prepared_data['frame'],
-                prepared_data['full_art'],
-                prepared_data['textless'],
-                prepared_data['booster'],
-                prepared_data['story_spotlight'],
-                prepared_data['prices'],
-                prepared_data['related_uris'],
-                prepared_data['purchase_uris']
-            ])
+            path = file.name.replace('\\', '\\\\').replace("'", "\\'")
+            self._cursor.execute(STAGING_TABLE_SQL)
+            self._cursor.execute("TRUNCATE TABLE cards_staging")
+            self._cursor.execute(
+                f"LOAD DATA LOCAL INFILE '{path}' IGNORE INTO TABLE cards_staging "
+                f"CHARACTER SET utf8mb4 FIELDS ESCAPED BY '' (id, j)"
+            )
+            loaded = self._cursor.rowcount
+            logger.info(f"Staged {loaded} cards")
             
+            # Counted before the upsert, whose affected rows cannot tell inserts and updates apart
+            self._cursor.execute("SELECT COUNT(*) FROM cards_staging s JOIN cards c ON c.id = s.id")
+            updated = self._cursor.fetchall()[0][0]
+            self._cursor.execute(STAGING_UPSERT_CARD_SQL)
+            
+            # Child rows are replaced wholesale, as the UpdateCard procedure does
+            for table in CARD_CHILD_TABLES:
+                self._cursor.execute(f"DELETE c FROM {table} c JOIN cards_staging s ON s.id = c.card_id")
+            for sql in STAGING_CHILD_SQL:
+                self._cursor.execute(sql)
             self.connection.commit()
-            cursor.close()
-            logger.info(f"Successfully upserted card: {prepared_data['name']} ({prepared_data['id']})")
-            return True
             
-        except Error as e:
-            logger.error(f"Error upserting card {card_data.get('name', 'Unknown')}: {e}")
+            stats['inserted'] = loaded - updated
+            stats['updated'] = updated
+            # Duplicate ids in the input are dropped by IGNORE and count as failed
+            stats['failed'] += staged - loaded
+            
+        except Exception as e:
+            logger.error(f"Error loading cards through staging table: {e}")
             self.connection.rollback()
-            return False
+            stats['failed'] += staged
+        finally:
+            os.unlink(file.name)
+            try:
+                self._cursor.execute("TRUNCATE TABLE cards_staging")
+            except Error:
+                pass
+        
+        return stats
     
-    def card_exists(self, card_id: str) -> bool:
-        """Check if a card exists in the database."""
-        if not self.connection:
-            return False
+    def _iter_valid_batches(self, cards: Iterable[Dict[str, Any]], batch_size: int,
+                            stats: Dict[str, int]) -> Iterator[List[Dict[str, Any]]]:
+        """Yield batches of cards that have an ID, counting the others as failed."""
+        cards = iter(cards)
+        processed = 0
+        batch_number = 0
         
-        try:
-            cursor = self.connection.cursor()
-            cursor.execute("SELECT COUNT(*) FROM cards WHERE id = %s", (card_id,))
-            result = cursor.fetchone()
-            cursor.close()
-            return result[0] > 0
-        except Error as e:
-            logger.error(f"Error checking if card exists: {e}")
-            return False
+        while True:
+            batch = list(islice(cards, batch_size))
+            if not batch:
+                break
+            batch_number += 1
+            logger.debug(f"Processing batch {batch_number}: cards {processed+1}-{processed+len(batch)}")
+            processed += len(batch)
+            
+            valid_cards = [card for card in batch if card.get('id')]
+            if len(valid_cards) < len(batch):
+                logger.warning(f"{len(batch) - len(valid_cards)} cards missing ID, skipping")
+                stats['failed'] += len(batch) - len(valid_cards)
+            yield valid_cards
     
-    def process_cards_batch(self, cards: List[Dict[str, Any]], batch_size: int = 100) -> Dict[str, int]:
-        """Process multiple cards in batches."""
+    def process_cards_stream(self, cards: Iterable[Dict[str, Any]], batch_size: int = 100) -> Dict[str, int]:
+        """Process cards from an iterator, holding only a few batches in memory at a time."""
         stats = {'inserted': 0, 'updated': 0, 'failed': 0}
-        total_cards = len(cards)
+        batches = self._iter_valid_batches(cards, batch_size, stats)
+        prepared_batches = ((len(batch), _prepare_batch(batch)) for batch in batches)
+        return self._write_prepared_batches(prepared_batches, stats)
+    
+    def process_raw_cards_stream(self, lines: Iterable[bytes], batch_size: int = 100,
+                                 prepare_workers: int = 1) -> Dict[str, int]:
+        """Process raw card JSON lines, decoded and converted to rows in a process pool.
         
-        for i in range(0, total_cards, batch_size):
-            batch = cards[i:i + batch_size]
-            logger.info(f"Processing batch {i//batch_size + 1}: cards {i+1}-{min(i+batch_size, total_cards)} of {total_cards}")
-            
-            for card in batch:
-                try:
-                    card_id = card.get('id')
-                    if not card_id:
-                        logger.warning("Card missing ID, skipping")
-                        stats['failed'] += 1
+        The workers prepare the next batches while the main thread writes the
+        previous ones to the database.
+        """
+        stats = {'inserted': 0, 'updated': 0, 'failed': 0}
+        lines = iter(lines)
+        line_batches = iter(lambda: list(islice(lines, batch_size)), [])
+        prepared_batches = _prepare_batches_parallel(line_batches, prepare_workers, stats)
+        return self._write_prepared_batches(prepared_batches, stats)
+    
+    def _write_prepared_batches(self, prepared_batches: Iterable[Tuple[int, Tuple[List[tuple], Dict[str, List[tuple]]]]],
+                                stats: Dict[str, int]) -> Dict[str, int]:
+        """Write (card count, rows) batches on the main connection, committing each one."""
+        started = time.perf_counter()
+        for batch_number, (batch_len, (card_rows, child_rows)) in enumerate(prepared_batches, 1):
+            try:
+                batch_stats = self._write_batch(self._cursor, card_rows, child_rows, self._upsert_cursor)
+                # One commit (and one redo log flush) per batch rather than per card
+                self.connection.commit()
+                stats['inserted'] += batch_stats['inserted']
+                stats['updated'] += batch_stats['updated']
+            except Exception as e:
+                logger.error(f"Error writing batch {batch_number} of {batch_len} cards: {e}")
+                self.connection.rollback()
+                stats['failed'] += batch_len
+            # Elapsed time includes reading and preparing the batch
+            finished = time.perf_counter()
+            _log_batch_rate(batch_number, batch_len, finished - started)
+            started = finished
+        
+        return stats
+    
+    def process_cards_parallel(self, cards: Iterable[Dict[str, Any]], batch_size: int = 100,
+                               workers: int = 4) -> Dict[str, int]:
+        """Process cards with several batches in flight, each on its own pooled connection.
+        
+        Commit latency dominates a batch, so overlapping commits on separate
+        connections scales throughput with the number of workers.
+        """
+        stats = {'inserted': 0, 'updated': 0, 'failed': 0}
+        stats_lock = threading.Lock()
+        # Bound the batches held in memory while workers are busy
+        in_flight = threading.BoundedSemaphore(workers * 2)
+        
+        pool = mariadb.ConnectionPool(
+            pool_name=f"mtg_cards_{id(self)}",
+            pool_size=workers,
+            host=self.host,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            port=self.port,
+            compress=self.compress,
+            autocommit=False,
+            # Under REPEATABLE READ the child DELETEs take next-key locks on the card_id
+            # gaps, which concurrent batches then deadlock on. Set once per connection, and
+            # kept across checkouts since resetting a returned connection would undo it.
+            init_command="SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED",
+            pool_reset_connection=False
+        )
+        
+        def write(card_rows: List[tuple], child_rows: Dict[str, List[tuple]]) -> Dict[str, int]:
+            connection = pool.get_connection()
+            try:
+                cursor = connection.cursor(buffered=False)
+                batch_stats = self._write_batch(cursor, card_rows, child_rows)
+                connection.commit()
+                cursor.close()
+                return batch_stats
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                # Returns the connection to the pool
+                connection.close()
+        
+        def upsert(batch_number: int, batch: List[Dict[str, Any]]):
+            started = time.perf_counter()
+            try:
+                card_rows, child_rows = _prepare_batch(batch)
+                for attempt in range(1, BATCH_ATTEMPTS + 1):
+                    try:
+                        batch_stats = write(card_rows, child_rows)
+                        break
+                    except Error as e:
+                        if e.errno not in RETRYABLE_ERRNOS or attempt == BATCH_ATTEMPTS:
+                            raise
+                        logger.warning(f"Batch {batch_number} hit a lock conflict, retrying (attempt {attempt}): {e}")
+                        time.sleep(0.05 * attempt)
+                with stats_lock:
+                    stats['inserted'] += batch_stats['inserted']
+                    stats['updated'] += batch_stats['updated']
+                _log_batch_rate(batch_number, len(batch), time.perf_counter() - started)
+            except Exception as e:
+                logger.error(f"Error writing batch {batch_number} of {len(batch)} cards: {e}")
+                with stats_lock:
+                    stats['failed'] += len(batch)
+            finally:
+                in_flight.release()
+        
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mtg-upsert') as executor:
+                for batch_number, valid_cards in enumerate(self._iter_valid_batches(cards, batch_size, stats), 1):
+                    if not valid_cards:
                         continue
-                    
-                    if self.card_exists(card_id):
-                        if self.update_card(card):
-                            stats['updated'] += 1
-                        else:
-                            stats['failed'] += 1
-                    else:
-                        if self.insert_card(card):
-                            stats['inserted'] += 1
-                        else:
-                            stats['failed'] += 1
-                            
-                except Exception as e:
-                    logger.error(f"Unexpected error processing card: {e}")
-                    stats['failed'] += 1
+                    in_flight.acquire()
+                    executor.submit(upsert, batch_number, valid_cards)
+        finally:
+            pool.close()
         
         return stats
+    
+    def process_cards_batch(self, cards: List[Dict[str, Any]], batch_size: int = 100) -> Dict[str, int]:
+        """Process multiple cards in batches."""
+        return self.process_cards_stream(cards, batch_size)
+
+
+def _log_batch_rate(batch_number: int, batch_len: int, elapsed: float):
+    """Log one aggregate progress line for a written batch."""
+    rate = batch_len / elapsed if elapsed > 0 else 0.0
+    logger.info(f"Batch {batch_number}: {batch_len} cards in {elapsed:.2f}s ({rate:.0f} cards/s)")
+
+
+def _prepare_batch(batch: List[Dict[str, Any]]) -> Tuple[List[tuple], Dict[str, List[tuple]]]:
+    """Convert a batch of cards into rows for the cards table and each child table."""
+    card_rows = []
+    child_rows = {table: [] for table in CARD_CHILD_TABLES}
+    
+    for card in batch:
+        card_rows.append(_row_tuple(card, _params=CARD_ROW_PARAMS))
+        for table, rows in MTGCardDatabase.card_child_rows(card).items():
+            child_rows[table].extend(rows)
+    
+    return card_rows, child_rows
+
+
+def _prepare_raw_batch(lines: List[bytes]) -> Tuple[int, Tuple[List[tuple], Dict[str, List[tuple]]]]:
+    """Decode a batch of raw card lines and prepare the cards that have an ID.
+    
+    Returns the number of cards skipped for a missing ID along with the rows.
+    """
+    cards = [_DECODE(line) for line in lines]
+    valid_cards = [card for card in cards if card.get('id')]
+    return len(cards) - len(valid_cards), _prepare_batch(valid_cards)
+
+
+def _prepare_batches_parallel(line_batches: Iterable[List[bytes]], workers: int,
+                              stats: Dict[str, int]) -> Iterator[Tuple[int, Tuple[List[tuple], Dict[str, List[tuple]]]]]:
+    """Decode and prepare raw card batches in a process pool, yielding (card count, rows) in input order.
+    
+    Workers receive the undecoded JSON bytes, so the main process neither parses
+    cards nor pickles dicts; it only splits lines and unpickles the rows. Cards
+    without an ID are counted as failed in stats. At most two batches per worker
+    are queued, so the input is not drained into memory ahead of the database writer.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        
+        def collect():
+            batch_len, future = pending.popleft()
+            skipped, rows = future.result()
+            if skipped:
+                logger.warning(f"{skipped} cards missing ID, skipping")
+                stats['failed'] += skipped
+            return batch_len - skipped, rows
+        
+        for batch in line_batches:
+            pending.append((len(batch), executor.submit(_prepare_raw_batch, batch)))
+            if len(pending) >= workers * 2:
+                yield collect()
+        while pending:
+            yield collect()
 
 
 class MTGCardProcessor:
@@ -421,50 +797,104 @@ class MTGCardProcessor:
         """Initialize with database configuration."""
         self.db = MTGCardDatabase(**db_config)
     
-    def load_json_file(self, file_path: str) -> Optional[List[Dict[str, Any]]]:
-        """Load JSON data from file."""
+    def load_json_file(self, file_path: str) -> Optional[Iterator[Dict[str, Any]]]:
+        """Open a JSON file and return an iterator streaming its cards one at a time."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                
-            # Handle different JSON structures
-            if isinstance(data, list):
-                return data
-            elif isinstance(data, dict):
-                # If it's a single card object
-                return [data]
-            else:
-                logger.error(f"Unexpected JSON structure in {file_path}")
-                return None
-                
+            file = open(file_path, 'rb')
         except FileNotFoundError:
             logger.error(f"File not found: {file_path}")
             return None
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON in {file_path}: {e}")
-            return None
         except Exception as e:
             logger.error(f"Error loading {file_path}: {e}")
             return None
+        
+        # Handle different JSON structures by peeking at the first significant byte
+        first = file.read(64).lstrip()[:1]
+        file.seek(0)
+        if first == b'[':
+            prefix = 'item'
+        elif first == b'{':
+            # If it's a single card object
+            prefix = ''
+        else:
+            logger.error(f"Unexpected JSON structure in {file_path}")
+            file.close()
+            return None
+        
+        return self._iter_json_items(file, prefix)
     
-    def process_file(self, file_path: str, batch_size: int = 100) -> bool:
+    def load_raw_cards(self, file_path: str) -> Optional[Iterator[bytes]]:
+        """Open a JSON array file with one card per line and return an iterator of the raw lines.
+        
+        This is the layout of the Scryfall bulk data files. Returns None when the
+        file is laid out otherwise, so the caller can parse it with ijson instead.
+        """
+        try:
+            file = open(file_path, 'rb')
+        except OSError:
+            # Left to load_json_file to report
+            return None
+        
+        first_line = file.readline().strip()
+        first_card = file.readline().strip().rstrip(b',')
+        if first_line != b'[' or not (first_card.startswith(b'{') and first_card.endswith(b'}')):
+            file.close()
+            return None
+        file.seek(0)
+        return self._iter_raw_lines(file)
+    
+    @staticmethod
+    def _iter_raw_lines(file: BinaryIO) -> Iterator[bytes]:
+        """Yield each card line without its trailing comma, closing the file once exhausted."""
+        with file:
+            for line in file:
+                raw = line.strip().rstrip(b',')
+                if raw and raw not in (b'[', b']'):
+                    yield raw
+    
+    @staticmethod
+    def _iter_json_items(file: BinaryIO, prefix: str) -> Iterator[Dict[str, Any]]:
+        """Yield the objects found at prefix, closing the file once exhausted."""
+        with file:
+            yield from ijson.items(file, prefix, use_float=True)
+    
+    def process_file(self, file_path: str, batch_size: int = 100, workers: int = 1,
+                     initial_load: bool = False, prepare_workers: int = 0,
+                     server_side: bool = False) -> bool:
         """Process a JSON file containing card data."""
         logger.info(f"Loading cards from: {file_path}")
         
-        cards = self.load_json_file(file_path)
-        if not cards:
-            return False
-        
-        logger.info(f"Loaded {len(cards)} cards from file")
+        # Preparation workers decode the cards themselves from the file's raw lines
+        lines = None
+        if prepare_workers > 0 and not (initial_load or server_side or workers > 1):
+            lines = self.load_raw_cards(file_path)
+            if lines is None:
+                logger.warning("File is not laid out one card per line, preparing batches inline")
+        if lines is None:
+            cards = self.load_json_file(file_path)
+            if cards is None:
+                return False
         
         if not self.db.connect():
             return False
         
         try:
-            stats = self.db.process_cards_batch(cards, batch_size)
+            if initial_load:
+                stats = self.db.bulk_load_initial(cards, batch_size)
+            elif server_side:
+                stats = self.db.load_via_staging(cards)
+            elif workers > 1:
+                stats = self.db.process_cards_parallel(cards, batch_size, workers)
+            elif lines is not None:
+                stats = self.db.process_raw_cards_stream(lines, batch_size, prepare_workers)
+            else:
+                stats = self.db.process_cards_stream(cards, batch_size)
             logger.info(f"Processing complete - Inserted: {stats['inserted']}, "
                        f"Updated: {stats['updated']}, Failed: {stats['failed']}")
             return stats['failed'] == 0
+        except (ijson.JSONError, json.JSONDecodeError) as e:
+            logger.error(f"Invalid JSON in {file_path}: {e}")
+            return False
         finally:
             self.db.disconnect()
     
@@ -475,6 +905,8 @@ class MTGCardProcessor:
         
         try:
             success = self.db.upsert_card(card_data)
+            if success:
+                self.db.connection.commit()
             return success
         finally:
             self.db.disconnect()
@@ -514,10 +946,21 @@ def main():
     parser.add_argument('json_file', help='Path to JSON file containing card data')
     parser.add_argument('--config', default='db_config.json', help='Database config file (default: db_config.json)')
     parser.add_argument('--batch-size', type=int, default=100, help='Batch size for processing (default: 100)')
+    parser.add_argument('--workers', type=int, default=1, help='Batches written concurrently on pooled connections (default: 1)')
+    parser.add_argument('--prepare-workers', type=int, default=0,
+                        help=f'Processes decoding and converting batches to rows ahead of the writer, for files with one '
+                             f'card per line like the Scryfall bulk data (default: 0, inline; up to {os.cpu_count()} cores)')
+    parser.add_argument('--initial-load', action='store_true', help='Populate empty tables with LOAD DATA LOCAL INFILE')
+    parser.add_argument('--server-side', action='store_true',
+                        help='Stage raw card JSON and transform it with MariaDB JSON functions (10.6+)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
+    parser.add_argument('--quiet', '-q', action='store_true', help='Log without timestamps')
     
     args = parser.parse_args()
     
+    if args.quiet:
+        # Skips formatting a timestamp for every record
+        logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s', force=True)
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
     
@@ -533,7 +976,8 @@ def main():
     
     # Process the file
     processor = MTGCardProcessor(db_config)
-    success = processor.process_file(args.json_file, args.batch_size)
+    success = processor.process_file(args.json_file, args.batch_size, args.workers, args.initial_load,
+                                     args.prepare_workers, args.server_side)
     
     if success:
         logger.info("All cards processed successfully!")
@@ -585,6 +1029,8 @@ def example_usage():
 """
 Required packages:
 pip install mysql-connector-python
+pip install ijson
+pip install orjson  # optional, faster JSON parameter encoding
 
 Usage examples:
 
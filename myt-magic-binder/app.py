@@ -1,7 +1,10 @@
 import os
 import logging
 
+import orjson
+
 from flask import Flask
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
@@ -14,8 +17,21 @@ class Base(DeclarativeBase):
 
 db = SQLAlchemy(model_class=Base)
 
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, using Flask's default() for types orjson lacks."""
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 # create the app
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.secret_key = os.environ.get("SESSION_SECRET", "mtg-cards-secret-key")
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
@@ -24,6 +40,8 @@ app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "postgres
 app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_recycle": 300,
     "pool_pre_ping": True,
+    # JSONB card columns are written through orjson
+    "json_serializer": lambda value: orjson.dumps(value).decode(),
 }
 
 # initialize the app with the extension
@@ -35,3 +53,5 @@ with app.app_context():
     import routes  # noqa: F401
     
     db.create_all()
+    # Imports whose worker died with an earlier process would otherwise show as running forever
+    routes.close_stale_imports()
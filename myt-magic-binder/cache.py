@@ -0,0 +1,40 @@
+import threading
+import time
+from functools import wraps
+
+# Every cached function, so an import can drop them all at once
+_cached_functions = []
+
+
+def ttl_cache(timeout):
+    """Cache the result of a no-argument function for `timeout` seconds."""
+    def decorator(func):
+        lock = threading.Lock()
+        state = {}
+
+        @wraps(func)
+        def wrapper():
+            now = time.monotonic()
+            with lock:
+                if state and state['expires'] > now:
+                    return state['value']
+            value = func()
+            with lock:
+                state['value'] = value
+                state['expires'] = now + timeout
+            return value
+
+        def cache_clear():
+            with lock:
+                state.clear()
+
+        wrapper.cache_clear = cache_clear
+        _cached_functions.append(wrapper)
+        return wrapper
+    return decorator
+
+
+def clear_all():
+    """Drop every cached value, e.g. once an import has changed the data."""
+    for func in _cached_functions:
+        func.cache_clear()
@@ -1,67 +1,144 @@
 import requests
-import json
 import logging
 import hashlib
+import functools
+import ijson
+import orjson
+from itertools import islice
 from datetime import datetime
 from app import app, db
 from models import Card, Set, Artist, Legality, ImportStatus
+import cache
+from sqlalchemy import select, delete, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import selectinload, joinedload
 from sqlalchemy.exc import IntegrityError
 
 logger = logging.getLogger(__name__)
 
+# Card columns refreshed when an existing card's hash changes
+CARD_UPDATE_COLUMNS = (
+    'name', 'oracle_text', 'flavor_text', 'mana_cost', 'cmc', 'type_line',
+    'power', 'toughness', 'loyalty', 'rarity', 'prices', 'data_hash'
+)
+
+# Keys covered by the card and set hashes, pre-sorted so hashing never sorts per call
+CARD_HASH_KEYS = tuple(sorted([
+    'id', 'name', 'oracle_text', 'mana_cost', 'cmc', 'type_line',
+    'power', 'toughness', 'loyalty', 'rarity', 'artist', 'flavor_text',
+    'colors', 'color_identity', 'legalities', 'prices'
+]))
+SET_HASH_KEYS = tuple(sorted([
+    'set', 'set_name', 'set_type', 'released_at', 'digital'
+]))
+
+
+def _hash_fields(data_dict, keys_to_hash):
+    """Calculate SHA-256 hash from selected keys in data dictionary."""
+    get = data_dict.get
+    hash_data = {key: get(key) for key in keys_to_hash if get(key) is not None}
+    
+    # Serialize straight to bytes with sorted keys for consistency
+    payload = orjson.dumps(hash_data, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _build_hasher(keys_to_hash, name):
+    """Generate a _hash_fields equivalent unrolled for a fixed key list.
+    
+    The generated function does the same presence checks and serialization
+    as _hash_fields, so digests are identical, without the per-key loop.
+    """
+    lines = [f"def {name}(data_dict):", "    get = data_dict.get", "    hash_data = {}"]
+    for i, key in enumerate(keys_to_hash):
+        lines.append(f"    v{i} = get({key!r})")
+        lines.append(f"    if v{i} is not None: hash_data[{key!r}] = v{i}")
+    lines.append("    return _sha256(_dumps(hash_data, default=str, option=_OPTIONS)).hexdigest()")
+    namespace = {
+        '_sha256': hashlib.sha256,
+        '_dumps': orjson.dumps,
+        '_OPTIONS': orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+    }
+    exec('\n'.join(lines), namespace)
+    return namespace[name]
+
+
+_card_digest = _build_hasher(CARD_HASH_KEYS, '_card_digest')
+_set_digest = _build_hasher(SET_HASH_KEYS, '_set_digest')
+
+
+# Server-side equivalent of _legalities_digest, for update_hashes. The payload is rebuilt
+# byte-for-byte as orjson writes it (compact, keys in code point order); format names and
+# statuses are plain ASCII so need no escaping.
+LEGALITY_HASH_SQL = text("""
+    update legality set data_hash = h.digest
+    from (
+        select card_id,
+               encode(sha256(convert_to(
+                   '{' || string_agg('"' || format_name || '":"' || legality_status || '"', ','
+                                     order by format_name collate "C") || '}',
+                   'UTF8')), 'hex') as digest
+        from legality
+        group by card_id
+    ) h
+    where legality.card_id = h.card_id
+      and legality.data_hash is distinct from h.digest
+""")
+
+
+@functools.lru_cache(maxsize=1024)
+def _legalities_digest(legalities_items):
+    """SHA-256 of a legalities mapping; only a few dozen distinct profiles exist."""
+    payload = orjson.dumps(dict(legalities_items), option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()
+
 
 class DataImporter:
 
     def __init__(self):
-        self.batch_size = 1000
+        # Each batch is a handful of multi-row upserts, so large batches amortize the round-trips
+        self.batch_size = 10000
         # self.scryfall_url = "https://data.scryfall.io/all-cards/all-cards-20250830092116.json"
         self.scryfall_url = "https://data.scryfall.io/default-cards/default-cards-20250830211634.json"
+        # Set hashes keyed by the hashed set fields, memoized for the whole import
+        self._set_hashes = {}
+        # Stored hash of every card, loaded once per import to skip unchanged cards
+        self._card_hashes = {}
+        # Identity maps for sets (code -> stored hash) and artists (name -> id), kept for the import
+        self._stored_set_hashes = {}
+        self._artist_ids = {}
     
     def _calculate_hash(self, data_dict, keys_to_hash):
         """Calculate SHA-256 hash from selected keys in data dictionary."""
-        # Sort keys for consistent hash calculation
-        hash_data = {}
-        for key in sorted(keys_to_hash):
-            if key in data_dict and data_dict[key] is not None:
-                hash_data[key] = data_dict[key]
-        
-        # Convert to JSON string with sorted keys for consistency
-        hash_string = json.dumps(hash_data, sort_keys=True, default=str)
-        return hashlib.sha256(hash_string.encode('utf-8')).hexdigest()
+        return _hash_fields(data_dict, keys_to_hash)
     
     def _calculate_card_hash(self, card_data):
         """Calculate hash for card data."""
-        card_keys = [
-            'id', 'name', 'oracle_text', 'mana_cost', 'cmc', 'type_line',
-            'power', 'toughness', 'loyalty', 'rarity', 'artist', 'flavor_text',
-            'colors', 'color_identity', 'legalities', 'prices'
-        ]
-        return self._calculate_hash(card_data, card_keys)
+        return _card_digest(card_data)
     
     def _calculate_set_hash(self, card_data):
         """Calculate hash for set data."""
-        set_keys = [
-            'set', 'set_name', 'set_type', 'released_at', 'digital'
-        ]
-        return self._calculate_hash(card_data, set_keys)
+        return _set_digest(card_data)
     
-    def _calculate_artist_hash(self, artist_name):
-        """Calculate hash for artist data."""
-        if not artist_name:
-            return None
-        return hashlib.sha256(artist_name.encode('utf-8')).hexdigest()
+    def _batch_set_hash(self, card_data):
+        """Set hash for a card, computed once per distinct set fields during the import."""
+        key = (card_data.get('set'), card_data.get('set_name'), card_data.get('set_type'),
+               card_data.get('released_at'), card_data.get('digital'))
+        set_hash = self._set_hashes.get(key)
+        if set_hash is None:
+            set_hash = self._set_hashes[key] = self._calculate_set_hash(card_data)
+        return set_hash
     
     def _calculate_legalities_hash(self, legalities_data):
         """Calculate hash for card legalities."""
         if not legalities_data:
             return None
-        hash_string = json.dumps(legalities_data, sort_keys=True)
-        return hashlib.sha256(hash_string.encode('utf-8')).hexdigest()
+        return _legalities_digest(frozenset(legalities_data.items()))
     
     def update_hashes(self, import_status_id):
         """Update hashes for all existing records in the database."""
         with app.app_context():
-            import_record = ImportStatus.query.get(import_status_id)
+            import_record = db.session.get(ImportStatus, import_status_id)
             if not import_record:
                 logger.error(f"Import status record not found: {import_status_id}")
                 return
@@ -73,19 +150,34 @@ class DataImporter:
                 
                 logger.info("Starting hash update for all existing records...")
                 
-                # Get all cards from the database
-                all_cards = Card.query.all()
-                total_cards = len(all_cards)
+                # Count instead of loading every card up front
+                total_cards = db.session.scalar(select(func.count(Card.id)))
                 import_record.total_cards = total_cards
                 db.session.commit()
                 
+                # Legality hashes only depend on the card's own legality rows, so the
+                # database recomputes them in one statement
+                db.session.execute(LEGALITY_HASH_SQL)
+                db.session.commit()
+                
                 logger.info(f"Updating hashes for {total_cards} cards...")
                 
+                # Load one batch at a time by id (keyset pagination), with legalities, artist and
+                # set loaded alongside rather than lazily per card. A server-side cursor would
+                # not survive the per-batch commits.
+                cards_query = Card.query.options(
+                    selectinload(Card.legalities),
+                    joinedload(Card.artist_rel),
+                    joinedload(Card.set_rel)
+                ).order_by(Card.id)
+                
                 # Process cards in batches for hash updates
                 processed = 0
-                for i in range(0, total_cards, self.batch_size):
-                    # Check if hash update was paused or cancelled
-                    db.session.refresh(import_record)
+                last_id = None
+                while True:
+                    # Check if hash update was paused or cancelled; only the status can change
+                    # under us, so reload just that column
+                    db.session.refresh(import_record, ['status'])
                     if import_record.status == 'paused':
                         logger.info("Hash update paused by user")
                         return
@@ -95,9 +187,15 @@ class DataImporter:
                         db.session.commit()
                         return
                     
-                    batch = all_cards[i:i + self.batch_size]
+                    batch_query = cards_query if last_id is None else cards_query.filter(Card.id > last_id)
+                    batch = batch_query.limit(self.batch_size).all()
+                    if not batch:
+                        break
+                    last_id = batch[-1].id
                     
                     for card in batch:
+                        legalities_data = {leg.format_name: leg.legality_status for leg in card.legalities}
+                        
                         # Create a mock card_data dict to calculate hash
                         card_data = {
                             'id': card.id,
@@ -114,40 +212,26 @@ class DataImporter:
                             'flavor_text': card.flavor_text,
                             'colors': None,  # Would need to reconstruct from association table
                             'color_identity': None,  # Would need to reconstruct from association table
-                            'legalities': {leg.format_name: leg.legality_status for leg in card.legalities},
+                            'legalities': legalities_data,
                             'prices': card.prices
                         }
                         
                         # Calculate and update card hash
                         new_hash = self._calculate_card_hash(card_data)
                         card.data_hash = new_hash
-                        
-                        # Update set hash if set exists
-                        if card.set_rel:
-                            set_data = {
-                                'set': card.set_rel.id,
-                                'set_name': card.set_rel.name,
-                                'set_type': card.set_rel.set_type,
-                                'released_at': card.set_rel.released_at,
-                                'digital': card.set_rel.digital
-                            }
-                            set_hash = self._calculate_set_hash(set_data)
-                            card.set_rel.data_hash = set_hash
-                        
-                        # Update artist hash if artist exists
-                        if card.artist_rel:
-                            artist_hash = self._calculate_artist_hash(card.artist_rel.name)
-                            card.artist_rel.data_hash = artist_hash
-                        
-                        # Update legalities hashes
-                        legalities_data = {leg.format_name: leg.legality_status for leg in card.legalities}
-                        if legalities_data:
-                            legalities_hash = self._calculate_legalities_hash(legalities_data)
-                            for legality in card.legalities:
-                                legality.data_hash = legalities_hash
                     
-                    # Commit the batch
-                    db.session.commit()
+                    # Sets are shared by many cards, so hash each distinct one once per batch
+                    for set_obj in {card.set_rel for card in batch if card.set_rel}:
+                        set_data = {
+                            'set': set_obj.id,
+                            'set_name': set_obj.name,
+                            'set_type': set_obj.set_type,
+                            'released_at': set_obj.released_at,
+                            'digital': set_obj.digital
+                        }
+                        set_obj.data_hash = self._calculate_set_hash(set_data)
+                    
+                    # Commit the batch together with the progress update
                     processed += len(batch)
                     import_record.processed_cards = processed
                     db.session.commit()
@@ -158,6 +242,7 @@ class DataImporter:
                 import_record.status = 'completed'
                 import_record.completed_at = datetime.utcnow()
                 db.session.commit()
+                cache.clear_all()
                 
                 logger.info("Hash update completed successfully!")
                 
@@ -171,7 +256,7 @@ class DataImporter:
     def import_data(self, import_status_id):
         """Main import function that runs in background thread."""
         with app.app_context():
-            import_record = ImportStatus.query.get(import_status_id)
+            import_record = db.session.get(ImportStatus, import_status_id)
             if not import_record:
                 logger.error(
                     f"Import status record not found: {import_status_id}")
@@ -192,6 +277,7 @@ class DataImporter:
                 import_record.status = 'completed'
                 import_record.completed_at = datetime.utcnow()
                 db.session.commit()
+                cache.clear_all()
 
                 logger.info("Import completed successfully!")
 
@@ -210,23 +296,30 @@ class DataImporter:
             response = requests.get(self.scryfall_url, stream=True)
             response.raise_for_status()
 
-            # Parse JSON data
-            data = response.json()
+            self._card_hashes = dict(db.session.execute(select(Card.id, Card.data_hash)).all())
+            self._stored_set_hashes = dict(db.session.execute(select(Set.id, Set.data_hash)).all())
+            self._artist_ids = dict(db.session.execute(select(Artist.name, Artist.id)).all())
+            logger.info(f"Loaded hashes for {len(self._card_hashes)} existing cards")
 
-            if not isinstance(data, list):
-                raise ValueError("Expected JSON array of cards")
+            # Stream cards off the wire instead of materializing the whole array
+            response.raw.read = functools.partial(response.raw.read, decode_content=True)
+            cards = ijson.items(response.raw, 'item', use_float=True)
 
-            total_cards = len(data)
-            import_record.total_cards = total_cards
-            db.session.commit()
-
-            logger.info(f"Processing {total_cards} cards...")
+            # The card count is only known once the stream ends, so it is estimated from the
+            # share of the download read so far
+            total_size = int(response.headers.get('content-length', 0))
+            logger.info("Processing cards as they download...")
 
             # Process cards in batches
             processed = 0
-            for i in range(0, total_cards, self.batch_size):
-                # Check if import was paused or cancelled
-                db.session.refresh(import_record)
+            while True:
+                batch = list(islice(cards, self.batch_size))
+                if not batch:
+                    break
+
+                # Check if import was paused or cancelled; only the status can change under us,
+                # so reload just that column
+                db.session.refresh(import_record, ['status'])
                 if import_record.status == 'paused':
                     logger.info("Import paused by user")
                     return
@@ -236,29 +329,43 @@ class DataImporter:
                     db.session.commit()
                     return
                 
-                batch = data[i:i + self.batch_size]
+                # Progress rides in the batch's transaction: one commit per batch
+                import_record.processed_cards = processed + len(batch)
+                downloaded = response.raw.tell()
+                if total_size and downloaded:
+                    import_record.total_cards = import_record.processed_cards * total_size // downloaded
                 self._process_batch(batch, import_record)
-
                 processed += len(batch)
-                import_record.processed_cards = processed
-                db.session.commit()
 
-                logger.info(
-                    f"Processed {processed}/{total_cards} cards ({(processed/total_cards)*100:.1f}%)"
-                )
+                logger.info(f"Processed {processed} cards")
+
+            import_record.total_cards = processed
+            db.session.commit()
 
         except requests.RequestException as e:
             raise Exception(f"Failed to download data: {str(e)}")
-        except json.JSONDecodeError as e:
+        except ijson.JSONError as e:
             raise Exception(f"Failed to parse JSON data: {str(e)}")
 
     def _process_batch(self, cards_batch, import_record):
-        """Process a batch of cards."""
-        try:
-            for card_data in cards_batch:
-                self._process_card(card_data)
+        """Upsert a batch of cards and their sets, artists and legalities, one statement per table."""
+        cards = {}
+        for card_data in cards_batch:
+            if not card_data.get('id'):
+                logger.warning("Card without ID found, skipping")
+                continue
+            # A card may appear only once per upsert statement
+            cards[card_data['id']] = card_data
 
-            # Commit the batch
+        try:
+            if cards:
+                self._upsert_sets(cards.values())
+                artist_ids = self._upsert_artists(cards.values())
+                changed_ids = self._upsert_cards(cards.values(), artist_ids)
+                self._replace_legalities([cards[card_id] for card_id in changed_ids])
+                logger.debug(f"Upserted {len(changed_ids)} new or changed cards out of {len(cards)}")
+
+            # Commit the batch together with the caller's progress update
             db.session.commit()
 
         except Exception as e:
@@ -266,220 +373,170 @@ class DataImporter:
             logger.error(f"Error processing batch: {str(e)}")
             raise
 
-    def _process_card(self, card_data):
-        """Process a single card and related entities."""
-        try:
-            # Process set first
-            set_obj = self._get_or_create_set(card_data)
-
-            # Process artist
-            artist_obj = self._get_or_create_artist(card_data)
-
-            # Create or update card
-            card = self._create_or_update_card(card_data, set_obj, artist_obj)
-
-            # Process legalities
-            self._process_legalities(card, card_data)
-
-        except Exception as e:
-            logger.error(
-                f"Error processing card {card_data.get('name', 'Unknown')}: {str(e)}"
-            )
-            # Continue processing other cards
-
-    def _get_or_create_set(self, card_data):
-        """Get or create a Set object with hash comparison."""
-        set_code = card_data.get('set')
-        if not set_code:
-            return None
-
-        # Calculate hash for set data
-        set_hash = self._calculate_set_hash(card_data)
-        
-        set_obj = Set.query.filter_by(id=set_code).first()
-        if not set_obj:
-            # Create new set
-            set_obj = Set(
-                id=set_code,
-                name=card_data.get('set_name', ''),
-                set_type=card_data.get('set_type'),
-                released_at=card_data.get('released_at'),
-                digital=card_data.get('digital', False),
-                scryfall_uri=card_data.get('scryfall_set_uri'),
-                uri=card_data.get('set_uri'),
-                search_uri=card_data.get('set_search_uri'),
-                data_hash=set_hash
-            )
-            db.session.add(set_obj)
-        elif set_obj.data_hash != set_hash:
-            # Update existing set if hash changed
-            set_obj.name = card_data.get('set_name', set_obj.name)
-            set_obj.set_type = card_data.get('set_type') or set_obj.set_type
-            set_obj.released_at = card_data.get('released_at') or set_obj.released_at
-            set_obj.digital = card_data.get('digital', set_obj.digital)
-            set_obj.scryfall_uri = card_data.get('scryfall_set_uri') or set_obj.scryfall_uri
-            set_obj.uri = card_data.get('set_uri') or set_obj.uri
-            set_obj.search_uri = card_data.get('set_search_uri') or set_obj.search_uri
-            set_obj.data_hash = set_hash
-
-        return set_obj
-
-    def _get_or_create_artist(self, card_data):
-        """Get or create an Artist object with hash comparison."""
-        artist_name = card_data.get('artist')
-        if not artist_name:
-            return None
-
-        # Calculate hash for artist data
-        artist_hash = self._calculate_artist_hash(artist_name)
-        
-        artist = Artist.query.filter_by(name=artist_name).first()
-        if not artist:
-            # Create new artist
-            artist = Artist(name=artist_name, data_hash=artist_hash)
-            db.session.add(artist)
-        elif artist.data_hash != artist_hash:
-            # Update hash if changed (though artist name rarely changes)
-            artist.data_hash = artist_hash
-
-        return artist
-
-    def _create_or_update_card(self, card_data, set_obj, artist_obj):
-        """Create or update a Card object with hash comparison."""
-        card_id = card_data.get('id')
-        if not card_id:
-            logger.warning("Card without ID found, skipping")
-            return None
+    def _upsert_sets(self, cards):
+        """Insert new sets and update those whose hash changed."""
+        rows = {}
+        for card_data in cards:
+            set_code = card_data.get('set')
+            if not set_code:
+                continue
+            set_hash = self._batch_set_hash(card_data)
+            if self._stored_set_hashes.get(set_code) == set_hash:
+                continue
+            rows[set_code] = {
+                'id': set_code,
+                'name': card_data.get('set_name', ''),
+                'set_type': card_data.get('set_type'),
+                'released_at': card_data.get('released_at'),
+                'digital': card_data.get('digital', False),
+                'scryfall_uri': card_data.get('scryfall_set_uri'),
+                'uri': card_data.get('set_uri'),
+                'search_uri': card_data.get('set_search_uri'),
+                'data_hash': set_hash
+            }
+
+        if not rows:
+            return
 
-        # Calculate hash for card data
-        card_hash = self._calculate_card_hash(card_data)
-        
-        # Check if card already exists
-        card = Card.query.filter_by(id=card_id).first()
-        if card:
-            # Only update if hash has changed
-            if card.data_hash != card_hash:
-                self._update_card_data(card, card_data, set_obj, artist_obj, card_hash)
-                logger.debug(f"Updated card {card.name} (hash changed)")
-            else:
-                logger.debug(f"Skipped card {card.name} (no changes)")
-        else:
-            # Create new card
-            card = self._create_new_card(card_data, set_obj, artist_obj, card_hash)
-            db.session.add(card)
-            logger.debug(f"Created new card {card.name}")
-
-        return card
-
-    def _create_new_card(self, card_data, set_obj, artist_obj, card_hash):
-        """Create a new Card object."""
-        card = Card(
-            id=card_data.get('id'),
-            oracle_id=card_data.get('oracle_id'),
-            multiverse_ids=json.dumps(card_data.get('multiverse_ids', [])),
-            mtgo_id=card_data.get('mtgo_id'),
-            mtgo_foil_id=card_data.get('mtgo_foil_id'),
-            tcgplayer_id=card_data.get('tcgplayer_id'),
-            cardmarket_id=card_data.get('cardmarket_id'),
-            name=card_data.get('name', ''),
-            lang=card_data.get('lang', 'en'),
-            released_at=card_data.get('released_at'),
-            uri=card_data.get('uri'),
-            scryfall_uri=card_data.get('scryfall_uri'),
-            layout=card_data.get('layout'),
-            image_status=card_data.get('image_status'),
-            image_uris=json.dumps(card_data.get('image_uris', {})),
-            mana_cost=card_data.get('mana_cost'),
-            cmc=card_data.get('cmc'),
-            type_line=card_data.get('type_line'),
-            oracle_text=card_data.get('oracle_text'),
-            flavor_text=card_data.get('flavor_text'),
-            power=card_data.get('power'),
-            toughness=card_data.get('toughness'),
-            loyalty=card_data.get('loyalty'),
-            set_id=set_obj.id if set_obj else None,
-            set_name=card_data.get('set_name'),
-            set_type=card_data.get('set_type'),
-            set_uri=card_data.get('set_uri'),
-            set_search_uri=card_data.get('set_search_uri'),
-            scryfall_set_uri=card_data.get('scryfall_set_uri'),
-            rulings_uri=card_data.get('rulings_uri'),
-            prints_search_uri=card_data.get('prints_search_uri'),
-            collector_number=card_data.get('collector_number'),
-            digital=card_data.get('digital', False),
-            rarity=card_data.get('rarity'),
-            artist_id=artist_obj.id if artist_obj else None,
-            illustration_id=card_data.get('illustration_id'),
-            border_color=card_data.get('border_color'),
-            frame=card_data.get('frame'),
-            frame_effects=json.dumps(card_data.get('frame_effects', [])),
-            security_stamp=card_data.get('security_stamp'),
-            full_art=card_data.get('full_art', False),
-            textless=card_data.get('textless', False),
-            booster=card_data.get('booster', False),
-            story_spotlight=card_data.get('story_spotlight', False),
-            prices=json.dumps(card_data.get('prices', {})),
-            purchase_uris=json.dumps(card_data.get('purchase_uris', {})),
-            related_uris=json.dumps(card_data.get('related_uris', {})),
-            data_hash=card_hash
+        set_table = Set.__table__
+        stmt = insert(set_table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[set_table.c.id],
+            set_={
+                'name': stmt.excluded.name,
+                'set_type': func.coalesce(stmt.excluded.set_type, set_table.c.set_type),
+                'released_at': func.coalesce(stmt.excluded.released_at, set_table.c.released_at),
+                'digital': stmt.excluded.digital,
+                'scryfall_uri': func.coalesce(stmt.excluded.scryfall_uri, set_table.c.scryfall_uri),
+                'uri': func.coalesce(stmt.excluded.uri, set_table.c.uri),
+                'search_uri': func.coalesce(stmt.excluded.search_uri, set_table.c.search_uri),
+                'data_hash': stmt.excluded.data_hash
+            },
+            where=set_table.c.data_hash.is_distinct_from(stmt.excluded.data_hash)
         )
-
-        return card
-
-    def _update_card_data(self, card, card_data, set_obj, artist_obj, card_hash):
-        """Update existing card with new data."""
-        # Update basic card information
-        card.name = card_data.get('name', card.name)
-        card.oracle_text = card_data.get('oracle_text', card.oracle_text)
-        card.flavor_text = card_data.get('flavor_text', card.flavor_text)
-        card.mana_cost = card_data.get('mana_cost', card.mana_cost)
-        card.cmc = card_data.get('cmc', card.cmc)
-        card.type_line = card_data.get('type_line', card.type_line)
-        card.power = card_data.get('power', card.power)
-        card.toughness = card_data.get('toughness', card.toughness)
-        card.loyalty = card_data.get('loyalty', card.loyalty)
-        card.rarity = card_data.get('rarity', card.rarity)
-        card.prices = json.dumps(card_data.get('prices', {}))
-        card.data_hash = card_hash
-
-        # Update relationships
-        if set_obj:
-            card.set_id = set_obj.id
-        if artist_obj:
-            card.artist_id = artist_obj.id
-
-    def _process_legalities(self, card, card_data):
-        """Process card legalities with hash comparison."""
-        if not card:
+        db.session.execute(stmt, list(rows.values()))
+        self._stored_set_hashes.update((set_code, row['data_hash']) for set_code, row in rows.items())
+
+    def _upsert_artists(self, cards):
+        """Insert artists not seen yet and return the name -> id map."""
+        names = {card_data.get('artist') for card_data in cards} - {None, ''} - self._artist_ids.keys()
+        if not names:
+            return self._artist_ids
+
+        # An artist is identified by its name alone, so an existing row never needs updating
+        artist_table = Artist.__table__
+        stmt = insert(artist_table).on_conflict_do_nothing(index_elements=[artist_table.c.name])
+        db.session.execute(stmt, [{'name': name} for name in names])
+
+        self._artist_ids.update(db.session.execute(
+            select(Artist.name, Artist.id).where(Artist.name.in_(names))
+        ).all())
+        return self._artist_ids
+
+    def _upsert_cards(self, cards, artist_ids):
+        """Insert new cards and update those whose hash changed, returning the ids written."""
+        rows = []
+        for card_data in cards:
+            card_hash = self._calculate_card_hash(card_data)
+            # Most cards are unchanged between dumps; skip building and sending their rows
+            if self._card_hashes.get(card_data['id']) == card_hash:
+                continue
+            rows.append(self._card_row(card_data, artist_ids, card_hash))
+
+        if not rows:
+            return []
+
+        # Core statements: plain executemany without ORM bulk-persistence bookkeeping
+        card_table = Card.__table__
+        stmt = insert(card_table)
+        update_columns = {column: stmt.excluded[column] for column in CARD_UPDATE_COLUMNS}
+        update_columns['set_id'] = func.coalesce(stmt.excluded.set_id, card_table.c.set_id)
+        update_columns['artist_id'] = func.coalesce(stmt.excluded.artist_id, card_table.c.artist_id)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[card_table.c.id],
+            set_=update_columns,
+            # Unchanged cards are skipped by the database and not returned
+            where=card_table.c.data_hash.is_distinct_from(stmt.excluded.data_hash)
+        ).returning(card_table.c.id)
+
+        changed_ids = db.session.execute(stmt, rows).scalars().all()
+        self._card_hashes.update((row['id'], row['data_hash']) for row in rows)
+        return changed_ids
+
+    def _card_row(self, card_data, artist_ids, card_hash):
+        """Build the card table row for a card."""
+        return {
+            'id': card_data.get('id'),
+            'oracle_id': card_data.get('oracle_id'),
+            'multiverse_ids': card_data.get('multiverse_ids', []),
+            'mtgo_id': card_data.get('mtgo_id'),
+            'mtgo_foil_id': card_data.get('mtgo_foil_id'),
+            'tcgplayer_id': card_data.get('tcgplayer_id'),
+            'cardmarket_id': card_data.get('cardmarket_id'),
+            'name': card_data.get('name', ''),
+            'lang': card_data.get('lang', 'en'),
+            'released_at': card_data.get('released_at'),
+            'uri': card_data.get('uri'),
+            'scryfall_uri': card_data.get('scryfall_uri'),
+            'layout': card_data.get('layout'),
+            'image_status': card_data.get('image_status'),
+            'image_uris': card_data.get('image_uris', {}),
+            'mana_cost': card_data.get('mana_cost'),
+            'cmc': card_data.get('cmc'),
+            'type_line': card_data.get('type_line'),
+            'oracle_text': card_data.get('oracle_text'),
+            'flavor_text': card_data.get('flavor_text'),
+            'power': card_data.get('power'),
+            'toughness': card_data.get('toughness'),
+            'loyalty': card_data.get('loyalty'),
+            'set_id': card_data.get('set') or None,
+            'set_name': card_data.get('set_name'),
+            'set_type': card_data.get('set_type'),
+            'set_uri': card_data.get('set_uri'),
+            'set_search_uri': card_data.get('set_search_uri'),
+            'scryfall_set_uri': card_data.get('scryfall_set_uri'),
+            'rulings_uri': card_data.get('rulings_uri'),
+            'prints_search_uri': card_data.get('prints_search_uri'),
+            'collector_number': card_data.get('collector_number'),
+            'digital': card_data.get('digital', False),
+            'rarity': card_data.get('rarity'),
+            'artist_id': artist_ids.get(card_data.get('artist')),
+            'illustration_id': card_data.get('illustration_id'),
+            'border_color': card_data.get('border_color'),
+            'frame': card_data.get('frame'),
+            'frame_effects': card_data.get('frame_effects', []),
+            'security_stamp': card_data.get('security_stamp'),
+            'full_art': card_data.get('full_art', False),
+            'textless': card_data.get('textless', False),
+            'booster': card_data.get('booster', False),
+            'story_spotlight': card_data.get('story_spotlight', False),
+            'prices': card_data.get('prices', {}),
+            'purchase_uris': card_data.get('purchase_uris', {}),
+            'related_uris': card_data.get('related_uris', {}),
+            'data_hash': card_hash
+        }
+
+    def _replace_legalities(self, cards):
+        """Replace the legalities of new or changed cards."""
+        cards = [card_data for card_data in cards if card_data.get('legalities')]
+        if not cards:
             return
 
-        legalities_data = card_data.get('legalities', {})
-        if not legalities_data:
-            return
+        db.session.execute(
+            delete(Legality.__table__).where(Legality.card_id.in_([card_data['id'] for card_data in cards]))
+        )
 
-        # Calculate hash for legalities
-        legalities_hash = self._calculate_legalities_hash(legalities_data)
-        
-        # Check if any existing legalities have different hash
-        existing_legalities = Legality.query.filter_by(card_id=card.id).all()
-        needs_update = True
-        
-        if existing_legalities:
-            # Check if any existing legality has a different hash
-            existing_hash = existing_legalities[0].data_hash if existing_legalities else None
-            if existing_hash == legalities_hash:
-                needs_update = False
-        
-        if needs_update:
-            # Remove existing legalities for this card
-            Legality.query.filter_by(card_id=card.id).delete()
-
-            # Add new legalities
-            for format_name, legality_status in legalities_data.items():
-                legality = Legality(
-                    card_id=card.id,
-                    format_name=format_name,
-                    legality_status=legality_status,
-                    data_hash=legalities_hash
-                )
-                db.session.add(legality)
+        rows = []
+        for card_data in cards:
+            legalities_data = card_data['legalities']
+            legalities_hash = self._calculate_legalities_hash(legalities_data)
+            rows.extend(
+                {
+                    'card_id': card_data['id'],
+                    'format_name': format_name,
+                    'legality_status': legality_status,
+                    'data_hash': legalities_hash
+                }
+                for format_name, legality_status in legalities_data.items()
+            )
+        db.session.execute(insert(Legality.__table__), rows)
@@ -1,5 +1,6 @@
 from app import db
-from sqlalchemy import Text, DateTime, Boolean, Integer, String, ForeignKey, Table
+from sqlalchemy import Text, DateTime, Boolean, Integer, String, Float, ForeignKey, Table, text, event, DDL, Computed
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -57,17 +58,23 @@ class Artist(db.Model):
     
     id = db.Column(Integer, primary_key=True, autoincrement=True)
     name = db.Column(String, unique=True, nullable=False)
-    data_hash = db.Column(String(64))  # SHA-256 hash of artist data
     
     # Relationship to cards
     cards = relationship("Card", back_populates="artist_rel")
 
 class Card(db.Model):
     __tablename__ = 'card'
+    __table_args__ = (
+        # Backs the (name, id) keyset pagination in view_data
+        db.Index('ix_card_name_id', 'name', 'id'),
+        # Trigram index so the name ILIKE '%...%' search need not scan every card
+        db.Index('ix_card_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
     
     id = db.Column(String, primary_key=True)  # scryfall id
     oracle_id = db.Column(String)
-    multiverse_ids = db.Column(Text)  # JSON array as string
+    multiverse_ids = db.Column(JSONB)  # JSON array
     mtgo_id = db.Column(Integer)
     mtgo_foil_id = db.Column(Integer)
     tcgplayer_id = db.Column(Integer)
@@ -83,7 +90,7 @@ class Card(db.Model):
     
     # Images
     image_status = db.Column(String)
-    image_uris = db.Column(Text)  # JSON as string
+    image_uris = db.Column(JSONB)
     
     # Mana cost and CMC
     mana_cost = db.Column(String)
@@ -119,7 +126,7 @@ class Card(db.Model):
     illustration_id = db.Column(String)
     border_color = db.Column(String)
     frame = db.Column(String)
-    frame_effects = db.Column(Text)  # JSON array as string
+    frame_effects = db.Column(JSONB)  # JSON array
     security_stamp = db.Column(String)
     full_art = db.Column(Boolean, default=False)
     textless = db.Column(Boolean, default=False)
@@ -127,13 +134,13 @@ class Card(db.Model):
     story_spotlight = db.Column(Boolean, default=False)
     
     # Prices
-    prices = db.Column(Text)  # JSON as string
+    prices = db.Column(JSONB)
     
     # Purchase URIs
-    purchase_uris = db.Column(Text)  # JSON as string
+    purchase_uris = db.Column(JSONB)
     
     # Related URIs
-    related_uris = db.Column(Text)  # JSON as string
+    related_uris = db.Column(JSONB)
     data_hash = db.Column(String(64))  # SHA-256 hash of card data
     
     # Relationships
@@ -150,11 +157,15 @@ class Card(db.Model):
     def __repr__(self):
         return f'<Card {self.name}>'
 
+# The trigram operator class comes from pg_trgm, which must exist before the card table's indexes
+event.listen(Card.__table__, 'before_create',
+             DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+
 class Legality(db.Model):
     __tablename__ = 'legality'
     
     id = db.Column(Integer, primary_key=True, autoincrement=True)
-    card_id = db.Column(String, ForeignKey('card.id'), nullable=False)
+    card_id = db.Column(String, ForeignKey('card.id'), nullable=False, index=True)
     format_name = db.Column(String, nullable=False)
     legality_status = db.Column(String, nullable=False)
     data_hash = db.Column(String(64))  # SHA-256 hash of legality data
@@ -164,6 +175,12 @@ class Legality(db.Model):
 
 class ImportStatus(db.Model):
     __tablename__ = 'import_status'
+    # At most one import or hash update may be running or paused at a time
+    __table_args__ = (
+        db.Index('uq_import_status_active', text('(1)'), unique=True,
+                 postgresql_where=text("status in ('running', 'paused')"),
+                 sqlite_where=text("status in ('running', 'paused')")),
+    )
     
     id = db.Column(Integer, primary_key=True, autoincrement=True)
     started_at = db.Column(DateTime, default=datetime.utcnow)
@@ -172,8 +189,13 @@ class ImportStatus(db.Model):
     total_cards = db.Column(Integer, default=0)
     processed_cards = db.Column(Integer, default=0)
     error_message = db.Column(Text)
-    
-    def progress_percentage(self):
-        if self.total_cards == 0:
-            return 0
-        return round((self.processed_cards / self.total_cards) * 100, 1)
+    # Heartbeat, moved on with every status write; a running import that stops moving it
+    # was left behind by a killed process
+    updated_at = db.Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Kept up to date by the database whenever the counters change
+    progress_percentage = db.Column(Float, Computed(
+        "coalesce(round(processed_cards * 100.0 / nullif(total_cards, 0), 1), 0)", persisted=True
+    ))
+    
+    # Read the computed percentage back with each INSERT/UPDATE instead of on next access
+    __mapper_args__ = {'eager_defaults': True}
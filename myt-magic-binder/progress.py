@@ -0,0 +1,92 @@
+import threading
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from models import ImportStatus
+
+# Imports run in a thread of this process, so their progress can be handed straight to
+# the status streams instead of each client polling the database
+_condition = threading.Condition()
+_snapshots = {}
+# Streams blocked in wait_for_update, per import; a finished import's snapshot is kept until they have it
+_waiting = {}
+_PENDING_KEY = 'import_status_snapshots'
+
+# Statuses the status streams keep following
+ACTIVE_STATUSES = ('pending', 'running')
+
+# What the status endpoints report, selectable without loading the whole record
+STATUS_COLUMNS = (
+    ImportStatus.id, ImportStatus.status, ImportStatus.total_cards, ImportStatus.processed_cards,
+    ImportStatus.progress_percentage, ImportStatus.error_message, ImportStatus.started_at,
+    ImportStatus.completed_at
+)
+
+
+def status_payload(import_record):
+    """JSON-ready view of an import status record or a row of STATUS_COLUMNS."""
+    return {
+        'id': import_record.id,
+        'status': import_record.status,
+        'total_cards': import_record.total_cards,
+        'processed_cards': import_record.processed_cards,
+        'progress_percentage': import_record.progress_percentage,
+        'error_message': import_record.error_message,
+        'started_at': import_record.started_at.isoformat() if import_record.started_at else None,
+        'completed_at': import_record.completed_at.isoformat() if import_record.completed_at else None
+    }
+
+
+def load_status(session, import_id):
+    """Status payload for an import read straight from the database, or None if it does not exist."""
+    row = session.execute(select(*STATUS_COLUMNS).where(ImportStatus.id == import_id)).one_or_none()
+    return status_payload(row) if row is not None else None
+
+
+def wait_for_update(import_id, snapshot, timeout):
+    """Block until a snapshot newer than `snapshot` is published, or the timeout passes.
+
+    Returns None on timeout, e.g. when the import runs in another process.
+    """
+    with _condition:
+        _waiting[import_id] = _waiting.get(import_id, 0) + 1
+        try:
+            changed = _condition.wait_for(lambda: _snapshots.get(import_id, snapshot) != snapshot, timeout)
+            return _snapshots[import_id] if changed else None
+        finally:
+            _waiting[import_id] -= 1
+            if not _waiting[import_id]:
+                del _waiting[import_id]
+                _evict_finished(import_id)
+
+
+def _evict_finished(import_id):
+    """Forget an import's snapshot once it has stopped running; the caller holds _condition."""
+    if import_id not in _waiting and _snapshots.get(import_id, {}).get('status') not in ACTIVE_STATUSES:
+        _snapshots.pop(import_id, None)
+
+
+@event.listens_for(ImportStatus, 'after_insert')
+@event.listens_for(ImportStatus, 'after_update')
+def _stage(mapper, connection, import_record):
+    """Remember each flushed status change, from the importer or a route, until commit."""
+    session = object_session(import_record)
+    session.info.setdefault(_PENDING_KEY, {})[import_record.id] = status_payload(import_record)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish(session):
+    """Hand committed status changes to waiting streams."""
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        with _condition:
+            _snapshots.update(pending)
+            _condition.notify_all()
+            for import_id in pending:
+                _evict_finished(import_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -1,23 +1,125 @@
-from flask import render_template, request, jsonify, flash, redirect, url_for
+from flask import render_template, stream_template, request, jsonify, flash, redirect, url_for, Response, abort
 from app import app, db
 from models import Card, Set, Artist, Legality, ImportStatus
 from data_importer import DataImporter
-from datetime import datetime
-import threading
+from cache import ttl_cache
+import progress
+from sqlalchemy import select, update, func, tuple_
+from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.exc import IntegrityError
+from werkzeug.exceptions import HTTPException
+from datetime import datetime, timedelta
 import logging
+import queue
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# One long-lived worker runs imports and hash updates in turn, rather than a new thread per request.
+# It is a daemon, like the per-request threads were, so a worker restart or shutdown never waits
+# for an import to finish. The interrupted import's row is left 'running' and is failed once its
+# heartbeat is STALE_IMPORT_AFTER old (see close_stale_imports), or can be cancelled by hand.
+_import_jobs = queue.Queue()
+
+def _run_import_jobs():
+    while True:
+        job, args = _import_jobs.get()
+        try:
+            job(*args)
+        except Exception:
+            logger.exception("Background import job failed")
+
+threading.Thread(target=_run_import_jobs, name='importer', daemon=True).start()
+
+def submit_import_job(job, *args):
+    """Queue an import or hash update behind any that is already running."""
+    _import_jobs.put((job, args))
+
+@ttl_cache(timeout=30)
+def get_counts():
+    """Card, set and artist counts in one round-trip, cached briefly for the dashboard."""
+    return db.session.execute(select(
+        select(func.count()).select_from(Card).scalar_subquery(),
+        select(func.count()).select_from(Set).scalar_subquery(),
+        select(func.count()).select_from(Artist).scalar_subquery()
+    )).one()
+
+@ttl_cache(timeout=300)
+def get_set_options():
+    """(id, name) of every set for the filter dropdown, without hydrating Set objects."""
+    return db.session.execute(select(Set.id, Set.name).order_by(Set.name)).all()
+
+@ttl_cache(timeout=300)
+def get_artist_list():
+    """(id, name) of every artist, which is all an artist row holds."""
+    return db.session.execute(select(Artist.id, Artist.name).order_by(Artist.name)).all()
+
+@app.errorhandler(409)
+def handle_conflict(e):
+    """An import is already active: say so on the dashboard."""
+    flash(e.description, 'warning')
+    return redirect(url_for('index'))
+
+@app.errorhandler(Exception)
+def handle_error(e):
+    """Log, flash and show any unexpected error from a view; HTTP errors pass through."""
+    if isinstance(e, HTTPException):
+        return e
+    db.session.rollback()
+    logger.error(f"Error handling {request.method} {request.path}: {str(e)}")
+    flash(f'Error: {str(e)}', 'danger')
+    return render_template('error.html'), 500
+
+# A running import whose status row has not been written for this long was left behind
+# by a killed process; imports write theirs at least once per batch
+STALE_IMPORT_AFTER = timedelta(minutes=10)
+
+def close_stale_imports():
+    """Fail running imports that stopped moving their heartbeat, so they release the active-import index."""
+    now = datetime.utcnow()
+    db.session.execute(
+        update(ImportStatus)
+        .where(ImportStatus.status == 'running',
+               func.coalesce(ImportStatus.updated_at, ImportStatus.started_at) < now - STALE_IMPORT_AFTER)
+        .values(status='failed', completed_at=now,
+                error_message='Interrupted: the import stopped reporting progress'),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.commit()
+
+def create_active_import(label):
+    """Insert a running ImportStatus, or abort with 409 if one is already active.
+    
+    The active-import index rejects the insert while another import or hash update
+    is running or paused. Running imports that went stale are failed first.
+    """
+    close_stale_imports()
+    import_status = ImportStatus(status='running')
+    db.session.add(import_status)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        active_status = db.session.scalar(
+            select(ImportStatus.status).where(ImportStatus.status.in_(['running', 'paused'])).limit(1)
+        ) or 'running'
+        abort(409, description=f'{label} is already {active_status}!')
+    return import_status
+
 @app.route('/')
 def index():
     """Main dashboard showing database stats and import controls."""
     # Get database statistics
-    card_count = Card.query.count()
-    set_count = Set.query.count()
-    artist_count = Artist.query.count()
+    card_count, set_count, artist_count = get_counts()
     
-    # Get latest import status
-    latest_import = ImportStatus.query.order_by(ImportStatus.id.desc()).first()
+    # Get latest import status, just the columns the dashboard shows
+    latest_import = db.session.execute(
+        select(ImportStatus.id, ImportStatus.status, ImportStatus.started_at, ImportStatus.completed_at,
+               ImportStatus.total_cards, ImportStatus.processed_cards)
+        .order_by(ImportStatus.id.desc())
+        .limit(1)
+    ).first()
     
     return render_template('index.html', 
                          card_count=card_count,
@@ -28,80 +130,112 @@ def index():
 @app.route('/start_import', methods=['POST'])
 def start_import():
     """Start the data import process in a background thread."""
-    try:
-        # Check if there's already an import running or paused
-        active_import = ImportStatus.query.filter(ImportStatus.status.in_(['running', 'paused'])).first()
-        if active_import:
-            flash(f'An import is already {active_import.status}!', 'warning')
-            return redirect(url_for('index'))
-        
-        # Create new import status record
-        import_status = ImportStatus(status='pending')
-        db.session.add(import_status)
-        db.session.commit()
-        
-        # Start import in background thread
-        importer = DataImporter()
-        thread = threading.Thread(target=importer.import_data, args=(import_status.id,))
-        thread.daemon = True
-        thread.start()
-        
-        flash('Data import started successfully!', 'success')
-        return redirect(url_for('import_status', import_id=import_status.id))
-        
-    except Exception as e:
-        logger.error(f"Error starting import: {str(e)}")
-        flash(f'Error starting import: {str(e)}', 'danger')
-        return redirect(url_for('index'))
+    import_status = create_active_import('An import')
+    
+    # Start import in the background worker
+    importer = DataImporter()
+    submit_import_job(importer.import_data, import_status.id)
+    
+    flash('Data import started successfully!', 'success')
+    return redirect(url_for('import_status', import_id=import_status.id))
 
 @app.route('/import_status/<int:import_id>')
 def import_status(import_id):
     """Show import progress page."""
-    import_record = ImportStatus.query.get_or_404(import_id)
+    import_record = db.get_or_404(ImportStatus, import_id)
     return render_template('import_status.html', import_record=import_record)
 
 @app.route('/api/import_status/<int:import_id>')
 def api_import_status(import_id):
     """API endpoint to get import status for AJAX updates."""
-    import_record = ImportStatus.query.get_or_404(import_id)
-    
-    return jsonify({
-        'id': import_record.id,
-        'status': import_record.status,
-        'total_cards': import_record.total_cards,
-        'processed_cards': import_record.processed_cards,
-        'progress_percentage': import_record.progress_percentage(),
-        'error_message': import_record.error_message,
-        'started_at': import_record.started_at.isoformat() if import_record.started_at else None,
-        'completed_at': import_record.completed_at.isoformat() if import_record.completed_at else None
-    })
+    status = progress.load_status(db.session, import_id)
+    if status is None:
+        abort(404)
+    
+    return jsonify(status)
+
+# Each open stream holds a worker thread, so it is ended after this many seconds and the
+# browser's EventSource reconnects after STREAM_RETRY_MS, giving other requests a turn
+STREAM_LIFETIME = 120
+STREAM_RETRY_MS = 3000
+
+@app.route('/api/import_status/<int:import_id>/stream')
+def api_import_status_stream(import_id):
+    """Server-Sent Events stream of import status, pushed as the importer progresses."""
+    snapshot = progress.load_status(db.session, import_id)
+    if snapshot is None:
+        abort(404)
+    
+    def generate(snapshot):
+        deadline = time.monotonic() + STREAM_LIFETIME
+        yield f"retry: {STREAM_RETRY_MS}\n"
+        while True:
+            yield f"data: {app.json.dumps(snapshot)}\n\n"
+            remaining = deadline - time.monotonic()
+            if snapshot['status'] not in progress.ACTIVE_STATUSES or remaining <= 0:
+                return
+            update = progress.wait_for_update(import_id, snapshot, timeout=min(15, remaining))
+            if update is None:
+                # Nothing published here for a while; the import may run in another
+                # process, so read the row once (this also keeps the connection alive)
+                with app.app_context():
+                    update = progress.load_status(db.session, import_id) or snapshot
+            snapshot = update
+    
+    return Response(generate(snapshot), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/view_data')
 def view_data():
     """View imported card data with pagination and search."""
-    page = request.args.get('page', 1, type=int)
+    # Keyset cursor: the (name, id) of the card the page starts after or ends before
+    after_name = request.args.get('after_name', type=str)
+    after_id = request.args.get('after_id', type=str)
+    before_name = request.args.get('before_name', type=str)
+    before_id = request.args.get('before_id', type=str)
+    per_page = 20
     search = request.args.get('search', '', type=str)
     set_filter = request.args.get('set', '', type=str)
     
-    # Build query
-    query = Card.query
+    # Build query, loading what the card modals show alongside each page instead of per card
+    query = Card.query.options(
+        joinedload(Card.set_rel),
+        joinedload(Card.artist_rel),
+        selectinload(Card.legalities)
+    )
     
     if search:
-        query = query.filter(Card.name.ilike(f'%{search}%'))
+        query = query.filter(Card.name.icontains(search, autoescape=True))
     
     if set_filter:
         query = query.filter(Card.set_id == set_filter)
     
-    # Get paginated results
-    cards = query.order_by(Card.name).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    # Seek past the cursor rather than OFFSET, so deep pages cost the same as the first.
+    # One extra row tells whether there is another page in that direction.
+    key = tuple_(Card.name, Card.id)
+    if before_name is not None and before_id is not None:
+        query = query.filter(key < tuple_(before_name, before_id)).order_by(Card.name.desc(), Card.id.desc())
+    else:
+        if after_name is not None and after_id is not None:
+            query = query.filter(key > tuple_(after_name, after_id))
+        query = query.order_by(Card.name, Card.id)
+    cards = query.limit(per_page + 1).all()
+    has_more = len(cards) > per_page
+    cards = cards[:per_page]
+    
+    if before_id is not None:
+        cards.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = after_id is not None, has_more
     
     # Get all sets for filter dropdown
-    sets = Set.query.order_by(Set.name).all()
+    sets = get_set_options()
     
     return render_template('view_data.html', 
                          cards=cards, 
+                         has_prev=has_prev,
+                         has_next=has_next,
                          sets=sets,
                          search=search,
                          set_filter=set_filter)
@@ -109,105 +243,80 @@ def view_data():
 @app.route('/card/<card_id>')
 def card_detail(card_id):
     """Show detailed information for a specific card."""
-    card = Card.query.get_or_404(card_id)
+    card = db.get_or_404(Card, card_id, options=[
+        joinedload(Card.set_rel),
+        joinedload(Card.artist_rel),
+        selectinload(Card.legalities)
+    ])
     return render_template('card_detail.html', card=card)
 
 @app.route('/sets')
 def sets():
     """Show all sets."""
-    sets = Set.query.order_by(Set.name).all()
-    return render_template('sets.html', sets=sets)
+    # Only the listed columns; the rows are fetched up front because the session is
+    # closed once the view returns, before the streamed page is consumed
+    sets = db.session.execute(
+        select(Set.id, Set.name, Set.set_type, Set.released_at, Set.card_count)
+        .order_by(Set.name)
+    ).all()
+    return Response(stream_template('sets.html', sets=sets))
 
 @app.route('/artists')
 def artists():
     """Show all artists."""
-    artists = Artist.query.order_by(Artist.name).all()
-    return render_template('artists.html', artists=artists)
+    artists = get_artist_list()
+    return Response(stream_template('artists.html', artists=artists))
 
 @app.route('/updateHashes', methods=['POST'])
 def update_hashes():
     """Update hashes for all existing records in the database."""
-    try:
-        # Check if there's already an import or hash update running or paused
-        active_import = ImportStatus.query.filter(ImportStatus.status.in_(['running', 'paused'])).first()
-        if active_import:
-            flash(f'An import or hash update is already {active_import.status}!', 'warning')
-            return redirect(url_for('index'))
-        
-        # Create new import status record for hash update
-        import_status = ImportStatus(status='pending')
-        db.session.add(import_status)
-        db.session.commit()
-        
-        # Start hash update in background thread
-        importer = DataImporter()
-        thread = threading.Thread(target=importer.update_hashes, args=(import_status.id,))
-        thread.daemon = True
-        thread.start()
-        
-        flash('Hash update started successfully!', 'success')
-        return redirect(url_for('import_status', import_id=import_status.id))
-        
-    except Exception as e:
-        logger.error(f"Error starting hash update: {str(e)}")
-        flash(f'Error starting hash update: {str(e)}', 'danger')
-        return redirect(url_for('index'))
+    import_status = create_active_import('An import or hash update')
+    
+    # Start hash update in the background worker
+    importer = DataImporter()
+    submit_import_job(importer.update_hashes, import_status.id)
+    
+    flash('Hash update started successfully!', 'success')
+    return redirect(url_for('import_status', import_id=import_status.id))
 
 @app.route('/pause_import/<int:import_id>', methods=['POST'])
 def pause_import(import_id):
     """Pause a running import."""
-    try:
-        import_record = ImportStatus.query.get_or_404(import_id)
-        if import_record.status == 'running':
-            import_record.status = 'paused'
-            db.session.commit()
-            flash('Import paused successfully!', 'info')
-        else:
-            flash('Import is not currently running!', 'warning')
-        return redirect(url_for('import_status', import_id=import_id))
-    except Exception as e:
-        logger.error(f"Error pausing import: {str(e)}")
-        flash(f'Error pausing import: {str(e)}', 'danger')
-        return redirect(url_for('import_status', import_id=import_id))
+    import_record = db.get_or_404(ImportStatus, import_id)
+    if import_record.status == 'running':
+        import_record.status = 'paused'
+        db.session.commit()
+        flash('Import paused successfully!', 'info')
+    else:
+        flash('Import is not currently running!', 'warning')
+    return redirect(url_for('import_status', import_id=import_id))
 
 @app.route('/resume_import/<int:import_id>', methods=['POST'])
 def resume_import(import_id):
     """Resume a paused import."""
-    try:
-        import_record = ImportStatus.query.get_or_404(import_id)
-        if import_record.status == 'paused':
-            import_record.status = 'running'
-            db.session.commit()
-            
-            # Resume import in background thread
-            importer = DataImporter()
-            thread = threading.Thread(target=importer.import_data, args=(import_record.id,))
-            thread.daemon = True
-            thread.start()
-            
-            flash('Import resumed successfully!', 'success')
-        else:
-            flash('Import is not currently paused!', 'warning')
-        return redirect(url_for('import_status', import_id=import_id))
-    except Exception as e:
-        logger.error(f"Error resuming import: {str(e)}")
-        flash(f'Error resuming import: {str(e)}', 'danger')
-        return redirect(url_for('import_status', import_id=import_id))
+    import_record = db.get_or_404(ImportStatus, import_id)
+    if import_record.status == 'paused':
+        import_record.status = 'running'
+        db.session.commit()
+        
+        # Resume import in the background worker, after the paused run has stopped
+        importer = DataImporter()
+        submit_import_job(importer.import_data, import_record.id)
+        
+        flash('Import resumed successfully!', 'success')
+    else:
+        flash('Import is not currently paused!', 'warning')
+    return redirect(url_for('import_status', import_id=import_id))
 
 @app.route('/cancel_import/<int:import_id>', methods=['POST'])
 def cancel_import(import_id):
     """Cancel a running or paused import."""
-    try:
-        import_record = ImportStatus.query.get_or_404(import_id)
-        if import_record.status in ['running', 'paused']:
-            import_record.status = 'cancelled'
-            import_record.completed_at = datetime.utcnow()
-            db.session.commit()
-            flash('Import cancelled successfully!', 'info')
-        else:
-            flash('Import cannot be cancelled in its current state!', 'warning')
-        return redirect(url_for('import_status', import_id=import_id))
-    except Exception as e:
-        logger.error(f"Error cancelling import: {str(e)}")
-        flash(f'Error cancelling import: {str(e)}', 'danger')
-        return redirect(url_for('import_status', import_id=import_id))
+    import_record = db.get_or_404(ImportStatus, import_id)
+    if import_record.status in ['running', 'paused']:
+        import_record.status = 'cancelled'
+        import_record.completed_at = datetime.utcnow()
+        db.session.commit()
+        flash('Import cancelled successfully!', 'info')
+    else:
+        flash('Import cannot be cancelled in its current state!', 'warning')
+    return redirect(url_for('import_status', import_id=import_id))
@@ -1,62 +1,84 @@
 // Auto-refresh functionality for import status page
 function startStatusPolling(importId) {
-    const pollInterval = 2000; // Poll every 2 seconds
+    const pollInterval = 2000; // Poll every 2 seconds when streaming is unavailable
     
-    function updateStatus() {
+    function updateStatus(data) {
+        // Update status badge
+        const statusBadge = document.getElementById('status-badge');
+        if (statusBadge) {
+            statusBadge.textContent = data.status.charAt(0).toUpperCase() + data.status.slice(1);
+            statusBadge.className = `badge bg-${getBadgeClass(data.status)}`;
+        }
+        
+        // Update progress bar if cards are being processed
+        if (data.total_cards > 0) {
+            const progressBar = document.getElementById('progress-bar');
+            const progressText = document.getElementById('progress-text');
+            
+            if (progressBar && progressText) {
+                progressBar.style.width = data.progress_percentage + '%';
+                progressText.textContent = `${data.processed_cards.toLocaleString()} / ${data.total_cards.toLocaleString()} (${data.progress_percentage}%)`;
+            }
+            
+            // Update sidebar stats
+            const totalCards = document.getElementById('total-cards');
+            const processedCards = document.getElementById('processed-cards');
+            const remainingCards = document.getElementById('remaining-cards');
+            
+            if (totalCards) {
+                totalCards.textContent = data.total_cards.toLocaleString();
+            }
+            if (processedCards) {
+                processedCards.textContent = data.processed_cards.toLocaleString();
+            }
+            if (remainingCards) {
+                remainingCards.textContent = (data.total_cards - data.processed_cards).toLocaleString();
+            }
+        }
+        
+        // Update completion time
+        if (data.completed_at) {
+            const completedTime = document.getElementById('completed-time');
+            if (completedTime) {
+                const date = new Date(data.completed_at);
+                completedTime.textContent = date.toLocaleString();
+            }
+        }
+        
+        // Refresh page after a short delay to show final state
+        if (data.status === 'completed' || data.status === 'failed') {
+            setTimeout(() => {
+                window.location.reload();
+            }, 2000);
+        }
+    }
+    
+    function isActive(data) {
+        return data.status === 'pending' || data.status === 'running';
+    }
+    
+    // Prefer the pushed stream; the server ends it once the import stops running
+    if (window.EventSource) {
+        const source = new EventSource(`/api/import_status/${importId}/stream`);
+        source.onmessage = event => {
+            const data = JSON.parse(event.data);
+            if (!isActive(data)) {
+                source.close();
+            }
+            updateStatus(data);
+        };
+        return;
+    }
+    
+    function pollStatus() {
         fetch(`/api/import_status/${importId}`)
             .then(response => response.json())
             .then(data => {
-                // Update status badge
-                const statusBadge = document.getElementById('status-badge');
-                if (statusBadge) {
-                    statusBadge.textContent = data.status.charAt(0).toUpperCase() + data.status.slice(1);
-                    statusBadge.className = `badge bg-${getBadgeClass(data.status)}`;
-                }
-                
-                // Update progress bar if cards are being processed
-                if (data.total_cards > 0) {
-                    const progressBar = document.getElementById('progress-bar');
-                    const progressText = document.getElementById('progress-text');
-                    
-                    if (progressBar && progressText) {
-                        progressBar.style.width = data.progress_percentage + '%';
-                        progressText.textContent = `${data.processed_cards.toLocaleString()} / ${data.total_cards.toLocaleString()} (${data.progress_percentage}%)`;
-                    }
-                    
-                    // Update sidebar stats
-                    const totalCards = document.getElementById('total-cards');
-                    const processedCards = document.getElementById('processed-cards');
-                    const remainingCards = document.getElementById('remaining-cards');
-                    
-                    if (totalCards) {
-                        totalCards.textContent = data.total_cards.toLocaleString();
-                    }
-                    if (processedCards) {
-                        processedCards.textContent = data.processed_cards.toLocaleString();
-                    }
-                    if (remainingCards) {
-                        remainingCards.textContent = (data.total_cards - data.processed_cards).toLocaleString();
-                    }
-                }
-                
-                // Update completion time
-                if (data.completed_at) {
-                    const completedTime = document.getElementById('completed-time');
-                    if (completedTime) {
-                        const date = new Date(data.completed_at);
-                        completedTime.textContent = date.toLocaleString();
-                    }
-                }
-                
-                // Stop polling if import is complete or failed
-                if (data.status === 'completed' || data.status === 'failed') {
-                    clearInterval(pollInterval);
-                    
-                    // Refresh page after a short delay to show final state
-                    setTimeout(() => {
-                        window.location.reload();
-                    }, 2000);
+                // Stop polling if import is no longer running
+                if (!isActive(data)) {
+                    clearInterval(intervalId);
                 }
+                updateStatus(data);
             })
             .catch(error => {
                 console.error('Error polling status:', error);
@@ -64,10 +86,10 @@ function startStatusPolling(importId) {
     }
     
     // Start polling
-    const intervalId = setInterval(updateStatus, pollInterval);
+    const intervalId = setInterval(pollStatus, pollInterval);
     
     // Initial update
-    updateStatus();
+    pollStatus();
 }
 
 function getBadgeClass(status) {
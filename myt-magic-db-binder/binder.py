@@ -4,17 +4,28 @@ Magic: The Gathering Card Data Importer - OPTIMIZED VERSION
 Imports card data from Scryfall JSON into PostgreSQL database
 """
 
-import json
-import hashlib
+import ijson
+import io
+import msgspec
+from msgspec.structs import astuple
+import os
+import orjson
+import queue
 import psycopg2
+import psycopg2.errors
 import psycopg2.extras
 import requests
-from datetime import datetime
-from typing import Dict, Any, Optional, List, Tuple
+import struct
+import xxhash
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, Set, Tuple, Iterable, Iterator, Mapping
+from itertools import chain, islice
 import sys
+import time
 from tqdm import tqdm
 import logging
-from concurrent.futures import ThreadPoolExecutor
+from collections import ChainMap, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import threading
 from psycopg2 import extensions
 
@@ -22,6 +33,345 @@ from psycopg2 import extensions
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Card columns, in the order prepare_card_batch builds each row
+CARD_COLUMNS = (
+    'id', 'oracle_id', 'multiverse_ids', 'mtgo_id', 'mtgo_foil_id', 'tcgplayer_id', 'cardmarket_id',
+    'name', 'lang', 'released_at', 'uri', 'scryfall_uri', 'layout', 'image_status', 'image_uris',
+    'mana_cost', 'cmc', 'type_line', 'oracle_text', 'flavor_text', 'power', 'toughness', 'loyalty',
+    'set_id', 'set_name', 'set_type', 'set_uri', 'set_search_uri', 'scryfall_set_uri',
+    'rulings_uri', 'prints_search_uri', 'collector_number', 'digital', 'rarity', 'artist_id',
+    'illustration_id', 'border_color', 'frame', 'frame_effects', 'security_stamp',
+    'full_art', 'textless', 'booster', 'story_spotlight', 'prices', 'purchase_uris',
+    'related_uris', 'data_hash'
+)
+
+# Set columns, in the order prepare_cards builds each set row
+SET_COLUMNS = ('id', 'name', 'set_type', 'released_at', 'digital', 'scryfall_uri', 'uri', 'search_uri')
+
+# Child tables rebuilt for every new or changed card, with the columns of their rows
+RELATED_TABLES = {
+    'card_colors': ('card_id', 'color'),
+    'card_color_identity': ('card_id', 'color'),
+    'card_types': ('card_id', 'type_name'),
+    'card_subtypes': ('card_id', 'subtype_name'),
+    'card_supertypes': ('card_id', 'supertype_name'),
+    'legality': ('card_id', 'format_name', 'legality_status'),
+}
+
+# Changed cards, their sets and their child rows are copied into these temp tables, then merged into
+# the real ones
+STAGING_TABLES_SQL = [
+    "CREATE TEMP TABLE IF NOT EXISTS card_staging (LIKE card INCLUDING DEFAULTS) ON COMMIT DELETE ROWS",
+    f"CREATE TEMP TABLE IF NOT EXISTS set_staging ON COMMIT DELETE ROWS AS "
+    f"SELECT {', '.join(SET_COLUMNS)} FROM \"set\" WITH NO DATA",
+    *(
+        f"CREATE TEMP TABLE IF NOT EXISTS {table}_staging ON COMMIT DELETE ROWS AS "
+        f"SELECT {', '.join(columns)} FROM {table} WITH NO DATA"
+        for table, columns in RELATED_TABLES.items()
+    ),
+]
+
+
+def _sync_related_ctes(table: str, columns: Tuple[str, ...]) -> str:
+    """CTEs bringing a child table in line with its staged rows for the staged cards
+    
+    Only rows that actually changed are deleted or inserted, so a card whose price moved
+    leaves its colors, types and legalities untouched.
+    """
+    same_row = ' AND '.join(f'staged.{column} = {table}.{column}' for column in columns)
+    return f"""
+        stale_{table} AS (
+            DELETE FROM {table}
+            WHERE card_id IN (SELECT id FROM card_staging)
+              AND NOT EXISTS (SELECT 1 FROM {table}_staging staged WHERE {same_row})
+        ),
+        new_{table} AS (
+            INSERT INTO {table} ({', '.join(columns)})
+            SELECT {', '.join(columns)} FROM {table}_staging staged
+            WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {same_row})
+        )"""
+
+
+# Statements run for every batch, prepared once per connection so the server parses and
+# plans them only once
+PREPARED_STATEMENTS = {
+    'merge_set_staging': f"""
+        INSERT INTO "set" ({', '.join(SET_COLUMNS)})
+        SELECT {', '.join(SET_COLUMNS)} FROM set_staging
+        ON CONFLICT (id) DO UPDATE SET
+            {', '.join(f'{column} = EXCLUDED.{column}' for column in SET_COLUMNS[1:])}
+    """,
+    'merge_card_staging': f"""
+        INSERT INTO card ({', '.join(CARD_COLUMNS)})
+        SELECT {', '.join(CARD_COLUMNS)} FROM card_staging
+        ON CONFLICT (id) DO UPDATE SET
+            {', '.join(f'{column} = EXCLUDED.{column}' for column in CARD_COLUMNS[1:])}
+    """,
+    # Every child table in one statement, and so one round trip; data-modifying CTEs run
+    # whether or not the final query reads them
+    'sync_related': f"""
+        WITH {','.join(_sync_related_ctes(table, columns) for table, columns in RELATED_TABLES.items())}
+        SELECT 1
+    """,
+}
+
+# Framing of the COPY binary format: signature, flags and header extension length up
+# front, a -1 field count to close
+_INT2 = struct.Struct('!h')
+_INT4 = struct.Struct('!i')
+_FLOAT8 = struct.Struct('!d')
+_PGCOPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + _INT4.pack(0) + _INT4.pack(0)
+_PGCOPY_TRAILER = _INT2.pack(-1)
+_NULL_FIELD = _INT4.pack(-1)
+
+
+def _encode_text(value) -> bytes:
+    # Strings, or the raw JSON of a card field
+    return value.encode() if isinstance(value, str) else bytes(value)
+
+
+def _encode_jsonb(value) -> bytes:
+    # jsonb is sent as a version byte followed by the JSON text
+    return b'\x01' + _encode_text(value)
+
+
+# Binary send encoders by column type, as named by ::regtype
+_BINARY_ENCODERS = {
+    'character varying': _encode_text,
+    'text': _encode_text,
+    'jsonb': _encode_jsonb,
+    'integer': _INT4.pack,
+    'bigint': struct.Struct('!q').pack,
+    'double precision': lambda value: _FLOAT8.pack(float(value)),
+    'boolean': lambda value: b'\x01' if value else b'\x00',
+}
+
+
+def _copy_buffer(rows: List[Tuple], encoders: Tuple) -> io.BytesIO:
+    """Write rows into a buffer ready for COPY ... FROM STDIN WITH (FORMAT binary)"""
+    buffer = io.BytesIO()
+    buffer.write(_PGCOPY_HEADER)
+    field_count = _INT2.pack(len(encoders))
+    for row in rows:
+        buffer.write(field_count)
+        for value, encode in zip(row, encoders):
+            if value is None:
+                buffer.write(_NULL_FIELD)
+                continue
+            data = encode(value)
+            buffer.write(_INT4.pack(len(data)))
+            buffer.write(data)
+    buffer.write(_PGCOPY_TRAILER)
+    buffer.seek(0)
+    return buffer
+
+
+# Download chunk size, and how many chunks the download may run ahead of parsing
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+DOWNLOAD_AHEAD = 32
+_DOWNLOAD_DONE = object()
+
+
+def _read_ahead(response: requests.Response) -> Iterator[Tuple[bytes, int]]:
+    """Yield the response body chunk by chunk, with the bytes read off the wire so far
+    
+    A background thread keeps downloading while the caller waits on parsing and writes,
+    so the download is hidden behind the import instead of stalling whenever it does.
+    """
+    chunks = queue.Queue(maxsize=DOWNLOAD_AHEAD)
+    stop = threading.Event()
+    
+    def download():
+        try:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if stop.is_set():
+                    return
+                chunks.put((chunk, response.raw.tell()))
+            chunks.put(_DOWNLOAD_DONE)
+        except Exception as e:
+            chunks.put(e)
+    
+    threading.Thread(target=download, name='downloader', daemon=True).start()
+    try:
+        while (item := chunks.get()) is not _DOWNLOAD_DONE:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Make room for a blocked download to notice it should stop
+        stop.set()
+        while not chunks.empty():
+            chunks.get_nowait()
+
+
+# Connections storing batches at the same time; batches touch disjoint cards, so
+# PostgreSQL can merge them in parallel
+DB_WRITERS = 4
+
+# Seconds between import status updates while cards are being written
+STATUS_INTERVAL = 1.0
+
+# A running import whose status row has not been written for this long was left behind
+# by a killed process, as the web app also assumes
+STALE_IMPORT_AFTER = timedelta(minutes=10)
+
+# Length of an xxh3-128 card hash stored as hex
+HASH_HEX_LENGTH = 32
+
+# Card rows hold the artist name here until the importer swaps in its id
+ARTIST_COLUMN = CARD_COLUMNS.index('artist_id')
+
+# Hashes of the cards already stored and the column types of the child tables, handed to
+# each preparation worker when it starts
+_existing_hashes = set()
+_related_encoders = {}
+
+
+def _copy_encoders(types: Tuple[str, ...]) -> Tuple:
+    return tuple(_BINARY_ENCODERS[column_type] for column_type in types)
+
+
+def _init_prepare_worker(existing_hashes: Set[bytes], related_types: Dict[str, Tuple[str, ...]]):
+    global _existing_hashes, _related_encoders
+    _existing_hashes = existing_hashes
+    _related_encoders = {table: _copy_encoders(types) for table, types in related_types.items()}
+
+
+class ScryfallCard(msgspec.Struct):
+    """The fields of a Scryfall card the importer stores; everything else is skipped unread
+    
+    The card columns come first and in CARD_COLUMNS order, so a card row is a slice of the
+    struct as a tuple. JSON valued columns are kept as the raw bytes of the card, ready to
+    be copied as they are instead of being decoded and serialized again.
+    """
+    id: str
+    oracle_id: Optional[str] = None
+    multiverse_ids: msgspec.Raw = msgspec.Raw(b'[]')
+    mtgo_id: Optional[int] = None
+    mtgo_foil_id: Optional[int] = None
+    tcgplayer_id: Optional[int] = None
+    cardmarket_id: Optional[int] = None
+    name: Optional[str] = None
+    lang: Optional[str] = None
+    released_at: Optional[str] = None
+    uri: Optional[str] = None
+    scryfall_uri: Optional[str] = None
+    layout: Optional[str] = None
+    image_status: Optional[str] = None
+    image_uris: msgspec.Raw = msgspec.Raw(b'{}')
+    mana_cost: Optional[str] = None
+    cmc: Optional[float] = None
+    type_line: Optional[str] = None
+    oracle_text: Optional[str] = None
+    flavor_text: Optional[str] = None
+    power: Optional[str] = None
+    toughness: Optional[str] = None
+    loyalty: Optional[str] = None
+    set_id: Optional[str] = msgspec.field(default=None, name='set')
+    set_name: Optional[str] = None
+    set_type: Optional[str] = None
+    set_uri: Optional[str] = None
+    set_search_uri: Optional[str] = None
+    scryfall_set_uri: Optional[str] = None
+    rulings_uri: Optional[str] = None
+    prints_search_uri: Optional[str] = None
+    collector_number: Optional[str] = None
+    digital: Optional[bool] = False
+    rarity: Optional[str] = None
+    # The artist's name, until the importer swaps in its id
+    artist_id: Optional[str] = msgspec.field(default=None, name='artist')
+    illustration_id: Optional[str] = None
+    border_color: Optional[str] = None
+    frame: Optional[str] = None
+    frame_effects: msgspec.Raw = msgspec.Raw(b'[]')
+    security_stamp: Optional[str] = None
+    full_art: Optional[bool] = False
+    textless: Optional[bool] = False
+    booster: Optional[bool] = False
+    story_spotlight: Optional[bool] = False
+    prices: msgspec.Raw = msgspec.Raw(b'{}')
+    purchase_uris: msgspec.Raw = msgspec.Raw(b'{}')
+    related_uris: msgspec.Raw = msgspec.Raw(b'{}')
+    colors: List[str] = []
+    color_identity: List[str] = []
+    type_names: List[str] = []
+    subtypes: List[str] = []
+    supertypes: List[str] = []
+    legalities: Dict[str, str] = {}
+
+
+_decode_card = msgspec.json.Decoder(ScryfallCard).decode
+
+# Every card column but data_hash comes straight from the struct
+CARD_FIELD_COUNT = len(CARD_COLUMNS) - 1
+assert ScryfallCard.__struct_fields__[:CARD_FIELD_COUNT] == CARD_COLUMNS[:CARD_FIELD_COUNT]
+
+
+def prepare_cards(raw_cards: List[bytes]) -> Tuple[int, List[Tuple], Dict[str, Tuple], Dict[str, bytes]]:
+    """Hash and flatten a chunk of raw card JSON; runs in a worker process
+    
+    Returns the number of cards read with the card rows, sets and child rows of the new or
+    changed ones. Card rows carry the artist name in place of artist_id, since new artists
+    are only created once the batch is written. Child rows are returned already encoded for
+    COPY, one payload per child table.
+    """
+    cards_to_upsert = []
+    sets_to_upsert = {}
+    related_rows = {table: [] for table in RELATED_TABLES}
+    
+    for raw_card in raw_cards:
+        try:
+            # The raw card includes its id, so a known digest means this very card is unchanged
+            # and it need not even be decoded
+            data_hash = xxhash.xxh3_128_digest(raw_card)
+            if data_hash in _existing_hashes:
+                continue
+            
+            card = _decode_card(raw_card)
+            card_id = card.id
+            
+            set_id = card.set_id
+            if set_id:
+                sets_to_upsert[set_id] = (
+                    set_id,
+                    card.set_name,
+                    card.set_type,
+                    card.released_at,
+                    card.digital,
+                    card.scryfall_set_uri,
+                    card.set_uri,
+                    card.set_search_uri
+                )
+            
+            cards_to_upsert.append(astuple(card)[:CARD_FIELD_COUNT] + (data_hash.hex(),))
+            
+            # Prepare related rows, one list per child table
+            related_rows['card_colors'].extend((card_id, color) for color in card.colors)
+            related_rows['card_color_identity'].extend(
+                (card_id, color) for color in card.color_identity)
+            related_rows['card_types'].extend(
+                (card_id, type_name) for type_name in card.type_names)
+            related_rows['card_subtypes'].extend(
+                (card_id, subtype) for subtype in card.subtypes)
+            related_rows['card_supertypes'].extend(
+                (card_id, supertype) for supertype in card.supertypes)
+            related_rows['legality'].extend(
+                (card_id, format_name, legality_status)
+                for format_name, legality_status in card.legalities.items())
+            
+        except Exception as e:
+            logger.error(f"✗ Error preparing card data: {e}")
+            continue
+    
+    # Child rows need nothing from the database, so they are encoded here rather than on the
+    # writer threads, which share the importer's GIL
+    related_copies = {
+        table: _copy_buffer(rows, _related_encoders[table]).getvalue()
+        for table, rows in related_rows.items() if rows
+    }
+    return len(raw_cards), cards_to_upsert, sets_to_upsert, related_copies
+
+
 class MTGImporter:
     def __init__(self, db_config: Dict[str, str]):
         """Initialize the importer with database configuration"""
@@ -29,8 +379,12 @@ class MTGImporter:
         self.conn = None
         self.cursor = None
         self.import_status_id = None
-        self.existing_hashes = {}  # Cache for hash lookups
+        self.existing_hashes = set()  # Digests of the stored cards
         self.existing_artists = {}  # Cache for artist lookups
+        self.upserted_sets = set()  # Sets already written by this import
+        self.downloaded = 0  # Bytes of the bulk file read off the wire so far
+        self.copy_types = {}  # Column types per staging table
+        self.copy_encoders = {}  # Binary COPY encoders per staging table
         self.lock = threading.Lock()  # For thread safety
 
     
@@ -85,31 +439,58 @@ class MTGImporter:
             # Ensure we start with a clean transaction state
             self.conn.rollback()
             
-            # Apply optimizations based on PostgreSQL version
+            # Optimize the session for bulk loading. WAL sizing (wal_buffers, max_wal_size) is
+            # server configuration and cannot be set here; trying to aborted the transaction and
+            # silently rolled back the settings below.
             try:
+                # A lost batch is simply rewritten by the next import, so commits need not wait
+                # for the WAL to reach disk
                 self.cursor.execute("SET synchronous_commit = off")
-                self.cursor.execute("SET wal_buffers = 16MB")
-                self.cursor.execute("SET commit_delay = 1000")
-                self.cursor.execute("SET commit_siblings = 10")
-                
-                # For PostgreSQL 9.5+ use max_wal_size instead of checkpoint_segments
-                self.cursor.execute("SHOW server_version_num")
-                version_num = int(self.cursor.fetchone()[0])
-                
-                if version_num >= 90500:  # PostgreSQL 9.5+
-                    self.cursor.execute("SET max_wal_size = 4GB")
-                else:
-                    self.cursor.execute("SET checkpoint_segments = 32")
-                    
+                # Keep the staging tables in memory; this only takes effect before the session
+                # first touches a temp table, hence ahead of prepare_statements
+                self.cursor.execute("SET temp_buffers = '256MB'")
+                # Let the merges and the child table diff hash in memory, and skip JIT: every
+                # batch runs the same short statements, which never repay compiling them
+                self.cursor.execute("SET work_mem = '64MB'")
+                self.cursor.execute("SET jit = off")
+                self.conn.commit()
                 logger.info("✓ Database connection established with optimizations")
             except Exception as opt_e:
+                self.conn.rollback()
                 logger.warning(f"⚠️  Some optimizations failed (this is usually OK): {opt_e}")
                 logger.info("✓ Database connection established")
+            
+            self.prepare_statements()
                 
         except Exception as e:
             logger.error(f"✗ Failed to connect to database: {e}")
             sys.exit(1)
     
+    def prepare_statements(self):
+        """Create the staging tables and prepare the per-batch statements for this session"""
+        # Temp tables skip the WAL entirely, so staging adds no logging on top of the real tables
+        for statement in STAGING_TABLES_SQL:
+            self.cursor.execute(statement)
+        for name, statement in PREPARED_STATEMENTS.items():
+            self.cursor.execute(f"PREPARE {name} AS {statement}")
+        staging_columns = {'card_staging': CARD_COLUMNS, 'set_staging': SET_COLUMNS}
+        staging_columns.update((f'{table}_staging', columns) for table, columns in RELATED_TABLES.items())
+        self.copy_types = {table: self.column_types(table, columns) for table, columns in staging_columns.items()}
+        self.copy_encoders = {table: _copy_encoders(types) for table, types in self.copy_types.items()}
+        self.conn.commit()
+    
+    def column_types(self, table: str, columns: Tuple[str, ...]) -> Tuple[str, ...]:
+        """Types of the given columns of a table, in column order, checked for binary COPY support"""
+        self.cursor.execute("""
+            SELECT attname, atttypid::regtype::text FROM pg_attribute
+            WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+        """, (table,))
+        types = dict(self.cursor.fetchall())
+        unsupported = {types[column] for column in columns} - _BINARY_ENCODERS.keys()
+        if unsupported:
+            raise ValueError(f"No binary COPY encoder for {table} column types: {', '.join(sorted(unsupported))}")
+        return tuple(types[column] for column in columns)
+    
     def disconnect_db(self):
         """Close database connection"""
         if self.cursor:
@@ -135,12 +516,19 @@ class MTGImporter:
         logger.info("📋 Loading existing card hashes...")
         self.ensure_clean_transaction()
         try:
-            self.cursor.execute("SELECT id, data_hash FROM card")
-            self.existing_hashes = dict(self.cursor.fetchall())
+            # Stream through a server-side cursor and keep only the raw digests: each one already
+            # identifies its card, so there is no need for a dict keyed by id. SHA-256 hashes left
+            # by the web app's importer can never match an xxh3-128 digest and are not fetched.
+            self.existing_hashes = set()
+            with self.conn.cursor(name='existing_card_hashes') as hash_cursor:
+                hash_cursor.itersize = 50000
+                hash_cursor.execute("SELECT data_hash FROM card WHERE length(data_hash) = %s", (HASH_HEX_LENGTH,))
+                self.existing_hashes.update(bytes.fromhex(data_hash) for data_hash, in hash_cursor)
             logger.info(f"✓ Loaded {len(self.existing_hashes):,} existing card hashes")
         except Exception as e:
+            # Without the hashes every card would be rewritten, so rather not import at all
             logger.error(f"✗ Failed to load existing hashes: {e}")
-            self.existing_hashes = {}
+            raise
     
     def load_existing_artists(self):
         """Pre-load all existing artists for faster lookup"""
@@ -154,30 +542,141 @@ class MTGImporter:
             logger.error(f"✗ Failed to load existing artists: {e}")
             self.existing_artists = {}
     
-    def calculate_hash(self, card_data: Dict[str, Any]) -> str:
-        """Calculate SHA-256 hash of card data for change detection"""
-        # Create a consistent string representation of the card data
-        card_str = json.dumps(card_data, sort_keys=True, ensure_ascii=False)
-        return hashlib.sha256(card_str.encode('utf-8')).hexdigest()
+    def open_writers(self, count: int) -> List['MTGImporter']:
+        """Connect importers that store batches in parallel, each on its own connection"""
+        writers = []
+        for _ in range(count):
+            writer = MTGImporter(self.db_config)
+            writer.connect_db()
+            writer.existing_artists = dict(self.existing_artists)
+            writers.append(writer)
+        return writers
+    
+    def card_table_empty(self) -> bool:
+        """Whether no card has been stored yet, by this importer or the web app's"""
+        self.ensure_clean_transaction()
+        self.cursor.execute("SELECT NOT EXISTS (SELECT 1 FROM card)")
+        empty = self.cursor.fetchone()[0]
+        self.conn.commit()
+        return empty
+    
+    def drop_search_indexes(self) -> List[str]:
+        """Drop the secondary indexes on card, returning their definitions for restore_indexes
+        
+        Only the primary key is needed while importing; the name and trigram indexes serve
+        the web app's searches and are far cheaper to build once than to maintain per row.
+        """
+        self.ensure_clean_transaction()
+        self.cursor.execute("""
+            SELECT indexrelid::regclass::text, pg_get_indexdef(indexrelid) FROM pg_index
+            WHERE indrelid = 'card'::regclass AND NOT indisprimary AND NOT indisunique
+        """)
+        indexes = self.cursor.fetchall()
+        for name, definition in indexes:
+            logger.info(f"🗂️  Dropping index until the import ends: {definition}")
+            self.cursor.execute(f"DROP INDEX {name}")
+        self.conn.commit()
+        return [definition for _, definition in indexes]
+    
+    def restore_indexes(self, definitions: List[str]):
+        """Recreate the indexes dropped by drop_search_indexes"""
+        if not definitions:
+            return
+        logger.info(f"🗂️  Rebuilding {len(definitions)} indexes...")
+        self.ensure_clean_transaction()
+        self.cursor.execute("SET LOCAL maintenance_work_mem = '1GB'")
+        for definition in definitions:
+            self.cursor.execute(definition)
+        self.conn.commit()
+    
+    def canonical_card_json(self, card_data: Dict[str, Any]) -> bytes:
+        """Consistent serialization of a card, for files not laid out one card per line"""
+        # orjson sorts the keys of every nested object natively, no Python-level walk needed
+        return orjson.dumps(card_data, option=orjson.OPT_SORT_KEYS)
+    
+    def iter_download_lines(self, response: requests.Response) -> Iterator[bytes]:
+        """Yield the lines of the response body as it downloads, tracking self.downloaded"""
+        pending = b''
+        for chunk, self.downloaded in _read_ahead(response):
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            yield from lines
+        if pending:
+            yield pending
+    
+    def iter_raw_cards(self, response: requests.Response) -> Iterator[bytes]:
+        """Yield the raw JSON of each card while the bulk file downloads
+        
+        Scryfall writes one card per line, so each card is handed on as soon as its line
+        arrives and is hashed from those exact bytes; any other layout is parsed with ijson
+        and each card re-serialized through canonical_card_json.
+        """
+        lines = self.iter_download_lines(response)
+        head = []
+        for line in lines:
+            head.append(line)
+            raw = line.strip().rstrip(b',')
+            if not raw or raw == b'[':
+                continue
+            try:
+                card_data = orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                card_data = None
+            if isinstance(card_data, dict):
+                yield raw
+                break
+            
+            # Parse incrementally, so memory stays flat however the file is laid out
+            logger.info("📄 Cards are not laid out one per line, parsing the stream incrementally")
+            cards = ijson.sendable_list()
+            parser = ijson.items_coro(cards, 'item', use_float=True)
+            for line in chain(head, lines):
+                parser.send(line + b'\n')
+                for card_data in cards:
+                    yield self.canonical_card_json(card_data)
+                del cards[:]
+            parser.close()
+            for card_data in cards:
+                yield self.canonical_card_json(card_data)
+            return
+        
+        for line in lines:
+            raw = line.strip().rstrip(b',')
+            if raw and raw != b']':
+                yield raw
     
     def start_import_status(self, total_cards: int) -> int:
         """Create import status record and return its ID"""
         try:
+            # Fail imports whose process died first, or they would hold uq_import_status_active forever.
+            # updated_at is the heartbeat, in UTC like the web app's timestamps.
+            now = datetime.utcnow()
+            self.cursor.execute("""
+                UPDATE import_status
+                SET status = 'failed', completed_at = %s, error_message = %s
+                WHERE status = 'running' AND COALESCE(updated_at, started_at) < %s
+            """, (now, 'Interrupted: the import stopped reporting progress', now - STALE_IMPORT_AFTER))
             self.cursor.execute("""
-                INSERT INTO import_status (started_at, status, total_cards, processed_cards)
-                VALUES (%s, %s, %s, %s)
+                INSERT INTO import_status (started_at, updated_at, status, total_cards, processed_cards)
+                VALUES (%s, %s, %s, %s, %s)
                 RETURNING id
-            """, (datetime.now(), 'running', total_cards, 0))
+            """, (datetime.now(), now, 'running', total_cards, 0))
             
             import_status_id = self.cursor.fetchone()[0]
             self.conn.commit()
             return import_status_id
+        except psycopg2.errors.UniqueViolation:
+            # uq_import_status_active allows one running or paused import, ours or the web
+            # app's; both write the same tables, so this one must not go ahead untracked
+            self.conn.rollback()
+            raise RuntimeError("Another import is already running or paused")
         except Exception as e:
             logger.error(f"✗ Failed to create import status: {e}")
             return None
     
-    def update_import_status(self, processed_cards: int, status: str = 'running', error_message: str = None):
-        """Update import status record"""
+    def update_import_status(self, processed_cards: int, status: str = 'running', error_message: str = None,
+                             total_cards: Optional[int] = None):
+        """Update import status record, and its total when given"""
         if not self.import_status_id:
             return
             
@@ -185,406 +684,146 @@ class MTGImporter:
             if status == 'completed':
                 self.cursor.execute("""
                     UPDATE import_status 
-                    SET processed_cards = %s, status = %s, completed_at = %s, error_message = %s
+                    SET processed_cards = %s, status = %s, completed_at = %s, error_message = %s,
+                        total_cards = COALESCE(%s, total_cards), updated_at = %s
                     WHERE id = %s
-                """, (processed_cards, status, datetime.now(), error_message, self.import_status_id))
+                """, (processed_cards, status, datetime.now(), error_message, total_cards, datetime.utcnow(),
+                      self.import_status_id))
             else:
                 self.cursor.execute("""
                     UPDATE import_status 
-                    SET processed_cards = %s, status = %s, error_message = %s
+                    SET processed_cards = %s, status = %s, error_message = %s,
+                        total_cards = COALESCE(%s, total_cards), updated_at = %s
                     WHERE id = %s
-                """, (processed_cards, status, error_message, self.import_status_id))
+                """, (processed_cards, status, error_message, total_cards, datetime.utcnow(), self.import_status_id))
             
             self.conn.commit()
         except Exception as e:
             logger.error(f"✗ Failed to update import status: {e}")
     
-    def card_needs_update(self, card_id: str, data_hash: str) -> bool:
-        """Check if card needs to be updated based on hash comparison (using cache)"""
-        existing_hash = self.existing_hashes.get(card_id)
-        if existing_hash is None:
-            return True  # Card doesn't exist, needs insert
-        return existing_hash != data_hash  # Compare hashes
-    
-    def get_or_create_artist_cached(self, artist_name: str) -> Optional[int]:
-        """Get existing artist ID or create new artist (using cache)"""
-        if not artist_name:
-            return None
-        
-        # Check cache first
-        if artist_name in self.existing_artists:
-            return self.existing_artists[artist_name]
+    def create_missing_artists(self, cards_data: List[Tuple]) -> Dict[str, int]:
+        """Insert every artist not yet in the cache in one statement, returning their ids by name"""
+        missing = {card[ARTIST_COLUMN] for card in cards_data if card[ARTIST_COLUMN]} - self.existing_artists.keys()
+        if not missing:
+            return {}
         
-        # Not in cache, need to create
+        self.ensure_clean_transaction()
         try:
-            self.cursor.execute(
-                "INSERT INTO artist (name) VALUES (%s) RETURNING id",
-                (artist_name,)
-            )
-            artist_id = self.cursor.fetchone()[0]
-            
-            # Update cache
-            self.existing_artists[artist_name] = artist_id
-            return artist_id
+            # Names go in sorted so concurrent writers insert them in the same order. Existing
+            # rows are left unlocked, as another writer's cards may hold key share locks on them.
+            artist_ids = dict(psycopg2.extras.execute_values(
+                self.cursor,
+                "INSERT INTO artist (name) VALUES %s ON CONFLICT (name) DO NOTHING RETURNING name, id",
+                [(name,) for name in sorted(missing)],
+                page_size=len(missing),
+                fetch=True
+            ))
             
-        except psycopg2.IntegrityError:
-            # Artist was created by another process, try to fetch
-            self.conn.rollback()
-            self.cursor.execute(
-                "SELECT id FROM artist WHERE name = %s",
-                (artist_name,)
-            )
-            result = self.cursor.fetchone()
-            if result:
-                artist_id = result[0]
-                self.existing_artists[artist_name] = artist_id
-                return artist_id
-            return None
+            # Names another writer inserted meanwhile are visible once the insert has waited for it
+            inserted_elsewhere = [name for name in missing if name not in artist_ids]
+            if inserted_elsewhere:
+                self.cursor.execute("SELECT name, id FROM artist WHERE name = ANY(%s)", (inserted_elsewhere,))
+                artist_ids.update(self.cursor.fetchall())
+            return artist_ids
         except Exception as e:
-            logger.error(f"✗ Error handling artist '{artist_name}': {e}")
-            return None
+            logger.error(f"✗ Failed to create artists: {e}")
+            raise
     
-    def prepare_card_batch(self, cards_batch: List[Dict[str, Any]]) -> Tuple[List, List, List]:
-        """Prepare batch data for bulk operations"""
-        cards_to_upsert = []
-        sets_to_upsert = []
-        related_data = []
-        
-        seen_sets = set()
-        
-        for card_data in cards_batch:
-            try:
-                data_hash = self.calculate_hash(card_data)
-                card_id = card_data.get('id')
-                
-                # Only process if card needs update
-                if not self.card_needs_update(card_id, data_hash):
-                    continue
-                
-                # Get or create artist
-                artist_id = self.get_or_create_artist_cached(card_data.get('artist'))
-                
-                # Prepare set data (avoid duplicates in batch)
-                set_id = card_data.get('set')
-                if set_id and set_id not in seen_sets:
-                    seen_sets.add(set_id)
-                    set_data = (
-                        set_id,
-                        card_data.get('set_name'),
-                        card_data.get('set_type'),
-                        card_data.get('released_at'),
-                        card_data.get('digital', False),
-                        card_data.get('scryfall_set_uri'),
-                        card_data.get('set_uri'),
-                        card_data.get('set_search_uri')
-                    )
-                    sets_to_upsert.append(set_data)
-                
-                # Prepare card data
-                card_fields = (
-                    card_id,
-                    card_data.get('oracle_id'),
-                    json.dumps(card_data.get('multiverse_ids', [])),
-                    card_data.get('mtgo_id'),
-                    card_data.get('mtgo_foil_id'),
-                    card_data.get('tcgplayer_id'),
-                    card_data.get('cardmarket_id'),
-                    card_data.get('name'),
-                    card_data.get('lang'),
-                    card_data.get('released_at'),
-                    card_data.get('uri'),
-                    card_data.get('scryfall_uri'),
-                    card_data.get('layout'),
-                    card_data.get('image_status'),
-                    json.dumps(card_data.get('image_uris', {})),
-                    card_data.get('mana_cost'),
-                    card_data.get('cmc'),
-                    card_data.get('type_line'),
-                    card_data.get('oracle_text'),
-                    card_data.get('flavor_text'),
-                    card_data.get('power'),
-                    card_data.get('toughness'),
-                    card_data.get('loyalty'),
-                    card_data.get('set'),
-                    card_data.get('set_name'),
-                    card_data.get('set_type'),
-                    card_data.get('set_uri'),
-                    card_data.get('set_search_uri'),
-                    card_data.get('scryfall_set_uri'),
-                    card_data.get('rulings_uri'),
-                    card_data.get('prints_search_uri'),
-                    card_data.get('collector_number'),
-                    card_data.get('digital', False),
-                    card_data.get('rarity'),
-                    artist_id,
-                    card_data.get('illustration_id'),
-                    card_data.get('border_color'),
-                    card_data.get('frame'),
-                    json.dumps(card_data.get('frame_effects', [])),
-                    card_data.get('security_stamp'),
-                    card_data.get('full_art', False),
-                    card_data.get('textless', False),
-                    card_data.get('booster', False),
-                    card_data.get('story_spotlight', False),
-                    json.dumps(card_data.get('prices', {})),
-                    json.dumps(card_data.get('purchase_uris', {})),
-                    json.dumps(card_data.get('related_uris', {})),
-                    data_hash
-                )
-                cards_to_upsert.append(card_fields)
-                
-                # Prepare related data
-                related_data.append({
-                    'card_id': card_id,
-                    'colors': card_data.get('colors', []),
-                    'color_identity': card_data.get('color_identity', []),
-                    'type_names': card_data.get('type_names', []),
-                    'subtypes': card_data.get('subtypes', []),
-                    'supertypes': card_data.get('supertypes', []),
-                    'legalities': card_data.get('legalities', {})
-                })
-                
-            except Exception as e:
-                logger.error(f"✗ Error preparing card data: {e}")
-                continue
+    def bulk_upsert_sets(self, sets_to_upsert: Dict[str, Tuple]) -> Iterable[str]:
+        """Upsert the sets not yet seen in this import, before the cards reference them
         
-        return cards_to_upsert, sets_to_upsert, related_data
-    
-    def bulk_upsert_sets(self, sets_data: List):
-        """Bulk upsert sets using execute_values"""
+        Returns the ids of the sets written.
+        """
+        sets_data = {
+            set_id: set_data for set_id, set_data in sets_to_upsert.items() if set_id not in self.upserted_sets
+        }
         if not sets_data:
-            return
+            return ()
         
+        self.ensure_clean_transaction()
         try:
-            psycopg2.extras.execute_values(
-                self.cursor,
-                """
-                INSERT INTO "set" (id, name, set_type, released_at, digital, scryfall_uri, uri, search_uri)
-                VALUES %s
-                ON CONFLICT (id) DO UPDATE SET
-                    name = EXCLUDED.name,
-                    set_type = EXCLUDED.set_type,
-                    released_at = EXCLUDED.released_at,
-                    digital = EXCLUDED.digital,
-                    scryfall_uri = EXCLUDED.scryfall_uri,
-                    uri = EXCLUDED.uri,
-                    search_uri = EXCLUDED.search_uri
-                """,
-                sets_data,
-                template=None,
-                page_size=1000
+            self.cursor.copy_expert(
+                f"COPY set_staging ({', '.join(SET_COLUMNS)}) FROM STDIN WITH (FORMAT binary)",
+                # Sorted, like artists, so concurrent writers lock sets in the same order
+                _copy_buffer([sets_data[set_id] for set_id in sorted(sets_data)], self.copy_encoders['set_staging'])
             )
+            self.cursor.execute("EXECUTE merge_set_staging")
+            return sets_data.keys()
         except Exception as e:
             logger.error(f"✗ Error bulk upserting sets: {e}")
             raise
     
     def bulk_upsert_cards(self, cards_data: List):
-        """Bulk upsert cards using execute_values"""
+        """Bulk upsert cards by copying them into a staging table and merging it into card"""
         if not cards_data:
             return
         
         try:
-            psycopg2.extras.execute_values(
-                self.cursor,
-                """
-                INSERT INTO card (
-                    id, oracle_id, multiverse_ids, mtgo_id, mtgo_foil_id, tcgplayer_id, cardmarket_id,
-                    name, lang, released_at, uri, scryfall_uri, layout, image_status, image_uris,
-                    mana_cost, cmc, type_line, oracle_text, flavor_text, power, toughness, loyalty,
-                    set_id, set_name, set_type, set_uri, set_search_uri, scryfall_set_uri,
-                    rulings_uri, prints_search_uri, collector_number, digital, rarity, artist_id,
-                    illustration_id, border_color, frame, frame_effects, security_stamp,
-                    full_art, textless, booster, story_spotlight, prices, purchase_uris,
-                    related_uris, data_hash
-                ) VALUES %s
-                ON CONFLICT (id) DO UPDATE SET
-                    oracle_id = EXCLUDED.oracle_id,
-                    multiverse_ids = EXCLUDED.multiverse_ids,
-                    mtgo_id = EXCLUDED.mtgo_id,
-                    mtgo_foil_id = EXCLUDED.mtgo_foil_id,
-                    tcgplayer_id = EXCLUDED.tcgplayer_id,
-                    cardmarket_id = EXCLUDED.cardmarket_id,
-                    name = EXCLUDED.name,
-                    lang = EXCLUDED.lang,
-                    released_at = EXCLUDED.released_at,
-                    uri = EXCLUDED.uri,
-                    scryfall_uri = EXCLUDED.scryfall_uri,
-                    layout = EXCLUDED.layout,
-                    image_status = EXCLUDED.image_status,
-                    image_uris = EXCLUDED.image_uris,
-                    mana_cost = EXCLUDED.mana_cost,
-                    cmc = EXCLUDED.cmc,
-                    type_line = EXCLUDED.type_line,
-                    oracle_text = EXCLUDED.oracle_text,
-                    flavor_text = EXCLUDED.flavor_text,
-                    power = EXCLUDED.power,
-                    toughness = EXCLUDED.toughness,
-                    loyalty = EXCLUDED.loyalty,
-                    set_id = EXCLUDED.set_id,
-                    set_name = EXCLUDED.set_name,
-                    set_type = EXCLUDED.set_type,
-                    set_uri = EXCLUDED.set_uri,
-                    set_search_uri = EXCLUDED.set_search_uri,
-                    scryfall_set_uri = EXCLUDED.scryfall_set_uri,
-                    rulings_uri = EXCLUDED.rulings_uri,
-                    prints_search_uri = EXCLUDED.prints_search_uri,
-                    collector_number = EXCLUDED.collector_number,
-                    digital = EXCLUDED.digital,
-                    rarity = EXCLUDED.rarity,
-                    artist_id = EXCLUDED.artist_id,
-                    illustration_id = EXCLUDED.illustration_id,
-                    border_color = EXCLUDED.border_color,
-                    frame = EXCLUDED.frame,
-                    frame_effects = EXCLUDED.frame_effects,
-                    security_stamp = EXCLUDED.security_stamp,
-                    full_art = EXCLUDED.full_art,
-                    textless = EXCLUDED.textless,
-                    booster = EXCLUDED.booster,
-                    story_spotlight = EXCLUDED.story_spotlight,
-                    prices = EXCLUDED.prices,
-                    purchase_uris = EXCLUDED.purchase_uris,
-                    related_uris = EXCLUDED.related_uris,
-                    data_hash = EXCLUDED.data_hash
-                """,
-                cards_data,
-                template=None,
-                page_size=500
+            self.cursor.copy_expert(
+                f"COPY card_staging ({', '.join(CARD_COLUMNS)}) FROM STDIN WITH (FORMAT binary)",
+                _copy_buffer(cards_data, self.copy_encoders['card_staging'])
             )
+            self.cursor.execute("EXECUTE merge_card_staging")
         except Exception as e:
             logger.error(f"✗ Error bulk upserting cards: {e}")
             raise
     
-    def bulk_insert_related_data(self, related_data_list: List):
-        """Bulk insert card-related data"""
-        if not related_data_list:
-            return
-        
+    def bulk_insert_related_data(self, related_copies: Dict[str, bytes]):
+        """Stage the child rows of the staged cards and apply only the differences"""
         try:
-            # Collect all related data for bulk operations
-            colors_data = []
-            color_identity_data = []
-            types_data = []
-            subtypes_data = []
-            supertypes_data = []
-            legalities_data = []
-            
-            card_ids = [data['card_id'] for data in related_data_list]
-            
-            # First, delete existing related data for these cards
-            if card_ids:
-                card_ids_tuple = tuple(card_ids)
-                tables = ['card_colors', 'card_color_identity', 'card_types', 'card_subtypes', 'card_supertypes', 'legality']
-                for table in tables:
-                    self.cursor.execute(f"DELETE FROM {table} WHERE card_id = ANY(%s)", (card_ids,))
-            
-            # Prepare bulk data
-            for data in related_data_list:
-                card_id = data['card_id']
-                
-                # Colors
-                for color in data['colors']:
-                    colors_data.append((card_id, color))
-                
-                # Color identity
-                for color in data['color_identity']:
-                    color_identity_data.append((card_id, color))
-                
-                # Types
-                for type_name in data['type_names']:
-                    types_data.append((card_id, type_name))
-                
-                # Subtypes
-                for subtype in data['subtypes']:
-                    subtypes_data.append((card_id, subtype))
-                
-                # Supertypes
-                for supertype in data['supertypes']:
-                    supertypes_data.append((card_id, supertype))
-                
-                # Legalities
-                for format_name, legality_status in data['legalities'].items():
-                    legalities_data.append((card_id, format_name, legality_status))
-            
-            # Bulk insert all related data
-            if colors_data:
-                psycopg2.extras.execute_values(
-                    self.cursor,
-                    "INSERT INTO card_colors (card_id, color) VALUES %s",
-                    colors_data,
-                    page_size=1000
+            for table, data in related_copies.items():
+                self.cursor.copy_expert(
+                    f"COPY {table}_staging ({', '.join(RELATED_TABLES[table])}) FROM STDIN WITH (FORMAT binary)",
+                    io.BytesIO(data)
                 )
             
-            if color_identity_data:
-                psycopg2.extras.execute_values(
-                    self.cursor,
-                    "INSERT INTO card_color_identity (card_id, color) VALUES %s",
-                    color_identity_data,
-                    page_size=1000
-                )
-            
-            if types_data:
-                psycopg2.extras.execute_values(
-                    self.cursor,
-                    "INSERT INTO card_types (card_id, type_name) VALUES %s",
-                    types_data,
-                    page_size=1000
-                )
-            
-            if subtypes_data:
-                psycopg2.extras.execute_values(
-                    self.cursor,
-                    "INSERT INTO card_subtypes (card_id, subtype_name) VALUES %s",
-                    subtypes_data,
-                    page_size=1000
-                )
-            
-            if supertypes_data:
-                psycopg2.extras.execute_values(
-                    self.cursor,
-                    "INSERT INTO card_supertypes (card_id, supertype_name) VALUES %s",
-                    supertypes_data,
-                    page_size=1000
-                )
-            
-            if legalities_data:
-                psycopg2.extras.execute_values(
-                    self.cursor,
-                    "INSERT INTO legality (card_id, format_name, legality_status) VALUES %s",
-                    legalities_data,
-                    page_size=1000
-                )
+            self.cursor.execute("EXECUTE sync_related")
                 
         except Exception as e:
             logger.error(f"✗ Error bulk inserting related data: {e}")
             raise
     
-    def process_batch(self, cards_batch: List[Dict[str, Any]]) -> Tuple[int, int]:
-        """Process a batch of cards"""
+    def process_batch(self, cards_data: List[Tuple], related_copies: Dict[str, bytes], artist_ids: Mapping[str, int]):
+        """Write a batch of prepared cards and their child rows"""
         try:
             # Ensure clean transaction state before processing
             self.ensure_clean_transaction()
             
-            # Prepare batch data
-            cards_data, sets_data, related_data = self.prepare_card_batch(cards_batch)
-            
             if not cards_data:
-                return 0, len(cards_batch)  # updated, skipped
+                return
+            
+            # Swap each artist name for its id
+            cards_data = [
+                card[:ARTIST_COLUMN] + (artist_ids.get(card[ARTIST_COLUMN]),) + card[ARTIST_COLUMN + 1:]
+                for card in cards_data
+            ]
             
             # Bulk operations
-            self.bulk_upsert_sets(sets_data)
             self.bulk_upsert_cards(cards_data)
-            self.bulk_insert_related_data(related_data)
-            
-            updated = len(cards_data)
-            skipped = len(cards_batch) - updated
-            
-            return updated, skipped
+            self.bulk_insert_related_data(related_copies)
             
         except Exception as e:
             logger.error(f"✗ Error processing batch: {e}")
             self.ensure_clean_transaction()
             raise
     
+    def write_batch(self, prepared_batch: Tuple[int, List[Tuple], Dict[str, Tuple], Dict[str, bytes]]) -> Tuple[int, int]:
+        """Store a prepared batch with its artists and sets, and commit it
+        
+        Everything goes in one transaction, so a batch costs a single commit round trip.
+        The artist and set caches only learn of rows once they are committed, since a failed
+        batch rolls its new artists and sets back too.
+        """
+        card_count, cards_data, sets_data, related_copies = prepared_batch
+        created_artists = self.create_missing_artists(cards_data)
+        written_sets = self.bulk_upsert_sets(sets_data)
+        self.process_batch(cards_data, related_copies, ChainMap(created_artists, self.existing_artists))
+        
+        self.conn.commit()
+        self.existing_artists.update(created_artists)
+        self.upserted_sets.update(written_sets)
+        return len(cards_data), card_count - len(cards_data)  # updated, skipped
+    
     def download_and_import(self, url: str, batch_size: int = 1000):
         """Download JSON data and import to database using batch processing"""
         logger.info(f"🌐 Downloading data from: {url}")
@@ -597,58 +836,118 @@ class MTGImporter:
             total_size = int(response.headers.get('content-length', 0))
             logger.info(f"📦 File size: {total_size / 1024 / 1024:.2f} MB")
             
-            # Download and parse JSON
-            logger.info("📥 Downloading and parsing JSON data...")
-            content = response.content.decode('utf-8')
-            cards_data = json.loads(content)
-            
-            total_cards = len(cards_data)
-            logger.info(f"🎴 Found {total_cards:,} cards to process")
+            # Start import status tracking first, as it fails when another import is active.
+            # The card count is only known once the stream ends, so it is estimated from the
+            # share of the file read so far.
+            self.import_status_id = self.start_import_status(0)
             
             # Load existing data for faster comparisons
             self.load_existing_hashes()
             self.load_existing_artists()
+            self.upserted_sets = set()
+            self.downloaded = 0
             
-            # Start import status tracking
-            self.import_status_id = self.start_import_status(total_cards)
-            
-            # Process cards in batches
+            # Process cards in batches as they are parsed from the download
+            logger.info("📥 Downloading and importing cards...")
+            raw_cards = self.iter_raw_cards(response)
+            parsed = 0
             processed = 0
             updated_total = 0
             skipped_total = 0
             errors = 0
+            batch_number = 0
+            status_updated_at = time.monotonic()
+            
+            # Writers connect before any index is dropped, so a failed connection cannot leave
+            # the indexes missing
+            writers = self.open_writers(DB_WRITERS)
+            idle_writers = queue.Queue()
+            for writer in writers:
+                idle_writers.put(writer)
             
-            with tqdm(total=total_cards, desc="Importing cards", unit="cards") as pbar:
-                for i in range(0, total_cards, batch_size):
-                    try:
-                        batch = cards_data[i:i + batch_size]
-                        updated, skipped = self.process_batch(batch)
+            # A first import writes every card, so its search indexes are built once at the end
+            dropped_indexes = self.drop_search_indexes() if self.card_table_empty() else []
+            
+            def write(prepared_batch):
+                writer = idle_writers.get()
+                try:
+                    return writer.write_batch(prepared_batch)
+                except Exception:
+                    writer.conn.rollback()  # Rollback failed batch
+                    raise
+                finally:
+                    idle_writers.put(writer)
+            
+            try:
+                # Worker processes hash, flatten and encode the next batches in parallel while
+                # writer threads, each with its own connection, store the ones already prepared
+                workers = os.cpu_count() or 1
+                related_types = {table: self.copy_types[f'{table}_staging'] for table in RELATED_TABLES}
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_prepare_worker,
+                                         initargs=(self.existing_hashes, related_types)) as preparers, \
+                        ThreadPoolExecutor(max_workers=len(writers),
+                                           thread_name_prefix='db-writer') as writer_threads, \
+                        tqdm(total=total_size or None, desc="Importing cards", unit="B", unit_scale=True,
+                             mininterval=0.5) as pbar:
+                    preparing = deque()
+                    writing = deque()
+                    while True:
+                        # Keep a couple of batches per worker queued, but no more of the download
+                        while len(preparing) < 2 * workers and (batch := list(islice(raw_cards, batch_size))):
+                            preparing.append((preparers.submit(prepare_cards, batch), self.downloaded))
                         
-                        updated_total += updated
-                        skipped_total += skipped
-                        processed += len(batch)
+                        # Give every writer a batch, in download order
+                        while preparing and len(writing) < len(writers):
+                            future, downloaded = preparing.popleft()
+                            prepared = future.result()
+                            batch_number += 1
+                            writing.append(
+                                (writer_threads.submit(write, prepared), prepared[0], downloaded, batch_number)
+                            )
                         
-                        # Commit after each batch
-                        self.conn.commit()
-                        self.update_import_status(processed)
+                        if not writing:
+                            break
                         
+                        future, card_count, written_downloaded, written_number = writing.popleft()
+                        try:
+                            updated, skipped = future.result()
+                            
+                            updated_total += updated
+                            skipped_total += skipped
+                            processed += card_count
+                            
+                        except Exception as e:
+                            errors += 1
+                            logger.error(f"✗ Error processing batch {written_number}: {e}")
+                        
+                        parsed += card_count
+                        
+                        # Each status update is a commit round trip on the main connection, so
+                        # it is sent at most every STATUS_INTERVAL; completion is always recorded
+                        if time.monotonic() - status_updated_at >= STATUS_INTERVAL:
+                            estimated_total = (
+                                parsed * total_size // written_downloaded if total_size and written_downloaded else None
+                            )
+                            self.update_import_status(processed, total_cards=estimated_total)
+                            status_updated_at = time.monotonic()
+                        
+                        # Let the update below repaint, at most every mininterval
                         pbar.set_postfix(
+                            cards=parsed,
                             updated=updated_total, 
                             skipped=skipped_total, 
                             errors=errors,
-                            batch_size=len(batch)
+                            batch_size=card_count,
+                            refresh=False
                         )
-                        pbar.update(len(batch))
-                        
-                    except Exception as e:
-                        errors += 1
-                        logger.error(f"✗ Error processing batch {i//batch_size + 1}: {e}")
-                        self.conn.rollback()  # Rollback failed batch
-                        pbar.update(min(batch_size, total_cards - i))
-                        continue
+                        pbar.update(written_downloaded - pbar.n)
+            finally:
+                for writer in writers:
+                    writer.disconnect_db()
+                self.restore_indexes(dropped_indexes)
             
             # Final status update
-            self.update_import_status(processed, 'completed')
+            self.update_import_status(processed, 'completed', total_cards=parsed)
             
             # Print summary
             logger.info(f"\n✅ Import completed successfully!")
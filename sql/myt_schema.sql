@@ -35,15 +35,34 @@ create table if not exists import_status (
 	status          varchar,
 	total_cards     integer,
 	processed_cards integer,
-	error_message   text
+	error_message   text,
+	updated_at      timestamp,
+	progress_percentage double precision generated always as
+		(coalesce(round(processed_cards * 100.0 / nullif(total_cards, 0), 1), 0)) stored
 );
 
 alter table import_status owner to myt_user;
 
+alter table import_status add column if not exists progress_percentage double precision generated always as
+	(coalesce(round(processed_cards * 100.0 / nullif(total_cards, 0), 1), 0)) stored;
+
+alter table import_status add column if not exists updated_at timestamp;
+
+-- Only one import may be running or paused; close any others that killed processes left
+-- behind, keeping the newest, so the index below can be built
+update import_status
+set status = 'failed',
+	completed_at = coalesce(completed_at, now() at time zone 'utc'),
+	error_message = coalesce(error_message, 'Interrupted: superseded by a later import')
+where status in ('running', 'paused')
+	and id < (select max(id) from import_status where status in ('running', 'paused'));
+
+create unique index if not exists uq_import_status_active on import_status ((1)) where status in ('running', 'paused');
+
 create table if not exists card (
 	id                  varchar not null constraint card_pkey primary key,
 	oracle_id           varchar,
-	multiverse_ids      text,
+	multiverse_ids      jsonb,
 	mtgo_id             integer,
 	mtgo_foil_id        integer,
 	tcgplayer_id        integer,
@@ -55,7 +74,7 @@ create table if not exists card (
 	scryfall_uri        varchar,
 	layout              varchar,
 	image_status        varchar,
-	image_uris          text,
+	image_uris          jsonb,
 	mana_cost           varchar,
 	cmc                 double precision,
 	type_line           varchar,
@@ -79,15 +98,15 @@ create table if not exists card (
 	illustration_id     varchar,
 	border_color        varchar,
 	frame               varchar,
-	frame_effects       text,
+	frame_effects       jsonb,
 	security_stamp      varchar,
 	full_art            boolean,
 	textless            boolean,
 	booster             boolean,
 	story_spotlight     boolean,
-	prices              text,
-	purchase_uris       text,
-	related_uris        text,
+	prices              jsonb,
+	purchase_uris       jsonb,
+	related_uris        jsonb,
 	data_hash           varchar(64)
 );
 
@@ -144,3 +163,17 @@ create table if not exists legality (
 
 alter table legality owner to myt_user;
 
+create index if not exists ix_legality_card_id on legality (card_id);
+
+create index if not exists ix_card_name_id on card (name, id);
+
+create extension if not exists pg_trgm;
+create index if not exists ix_card_name_trgm on card using gin (name gin_trgm_ops);
+
+alter table card
+	alter column multiverse_ids type jsonb using multiverse_ids::jsonb,
+	alter column image_uris type jsonb using image_uris::jsonb,
+	alter column frame_effects type jsonb using frame_effects::jsonb,
+	alter column prices type jsonb using prices::jsonb,
+	alter column purchase_uris type jsonb using purchase_uris::jsonb,
+	alter column related_uris type jsonb using related_uris::jsonb;